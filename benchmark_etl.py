@@ -0,0 +1,522 @@
+import argparse
+import copy
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import tempfile
+import time
+import unicodedata
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+import etl_normalize
+import etl_transforms
+from etl_db import ENTITIES_QUERY, ENTITIES_SIGNATURE_QUERY
+
+#============================================== CONFIGURAÇÃO ============================================#
+
+# Configuração equivalente ao config.json do ETL_20_3 (caminhos preenchidos pelo benchmark)
+CONFIG_BENCH = {
+    "ano": "2024",
+    "file_paths": {},
+    "columns": {
+        "targets": [
+            "ENTIDADE DO SUBSETOR DA ADMINISTRAÇÃO LOCAL",
+            "DESIGNAÇÃO DA ENTIDADE",
+            "NUT II",
+            "RESPONSÁVEL",
+            "DATA DE INICIO",
+            "DATA DA ULTIMA ACCAO"
+        ],
+        "check_duplicates": "DESIGNAÇÃO DA ENTIDADE",
+        "aliases": {"DESIGNAÇÃO DA ENTIDADE": ["MUNICIPIO DE"]},
+        "entity_type": "ENTIDADE DO SUBSETOR DA ADMINISTRAÇÃO LOCAL",
+        "responsible": "RESPONSÁVEL",
+        "num_formandos": "Nº TOTAL DE FORMANDOS"
+    },
+    "invalid_values": ["ND", "NULL", "NA", "N/A", "NUNCA", "", " "],
+    "ws_title": "ETL-{ano}",
+    "fuzzy_limit": 80,
+    "keywords": {
+        "n_entidades_municipios": 1,
+        "n_entidades_freguesias": 2,
+        "municipio": ["MUNICIPIO", "CAMARA", "MUNICIPAL", "CM "],
+        "freguesia": ["FREGUESIA", "JUNTA DE FREGUESIA", "FREGUESIA", "JUNTA", "UNIAO"],
+        "entity_types": ["COMUNIDADE INTERMUNICIPAL", "SERVICOS MUNICIPALIZADOS", "SETOR EMPRESARIAL LOCAL",
+                         "EMPRESAS MUNICIPAIS / INTERMUNICIPAIS", "ENTIDADE DO SUBSETOR DA ADMINISTRAÇÃO LOCAL"],
+        "training": ["formação", "curso"],
+        "comment": ["comentário", "sugestões"],
+        "group_time": ["tempo do grupo"],
+        "thematic_areas": ["áreas temáticas"],
+        "continuous_training": ["contínua"],
+        "preference": ["preferência"],
+        "regime": ["regime"]
+    },
+    "descriptions": {
+        "comment": "O QUE PRETENDEM SOBRE",
+        "group_time": "TEMPO DO GRUPO",
+        "interest": "INTERESSE",
+        "continuous_training": "FORMAÇÃO CONTÍNUA",
+        "preference": "PREFERÊNCIA (1-6)",
+        "training_course": "FORMAÇÃO/CURSO",
+        "regime": "REGIME"
+    },
+    "data_keys": {
+        "submission_date": "DATA DE SUBMISSAO",
+        "start_date": "DATA DE INICIO",
+        "end_date": "DATA DA ULTIMA ACCAO",
+        "submitted": "FOI SUBMETIDO?",
+        "completion_time": "TEMPO DE REALIZAÇÃO"
+    },
+    "default_values": {"empty": "VAZIO", "no": "NAO"},
+    "prefixs": {
+        "municipios": "^\\s*(MUNICIPIO|MUNICÍPIO|CAMARA MUNICIPAL|CM)\\s+DE\\s+",
+        "freguesias": "^\\s*(FREGUESIA|JUNTA DE FREGUESIA|UNIAO DE FREGUESIAS|UNIAO DAS FREGUESIAS)\\s+DE\\s+"
+    },
+    "trainings": True,
+    "interests": False
+}
+
+NUTS2 = ["Norte", "Centro", "Área Metropolitana de Lisboa", "Alentejo", "Algarve",
+         "Região Autónoma dos Açores", "Região Autónoma da Madeira"]
+
+SILABAS = ["al", "ba", "ca", "da", "es", "fa", "go", "la", "ma", "na", "or", "pa", "ra", "sa", "ta", "va",
+           "bri", "cas", "fon", "gua", "lou", "mon", "por", "san", "tor", "vi", "zel", "ão", "ém", "ia"]
+
+# Tipos de entidade no inquérito e correspondência (ConfigMapEnt / ent_tipo do SII)
+TIPOS_ENTIDADE = {
+    "Município": "Municípios",
+    "Freguesia": "Freguesias",
+    "Serviços Municipalizados": "Serviços Municipalizados"
+}
+
+#========================================================================================================#
+
+#=============================================== GERADOR ================================================#
+
+# Função para gerar um nome de local a partir de sílabas (ex.: "Vila Nova de Santorão")
+def gerar_nome_local(rng):
+    nome = "".join(rng.choice(SILABAS) for _ in range(rng.randint(2, 4))).capitalize()
+    forma = rng.random()
+    if forma < 0.15:
+        return f"Vila Nova de {nome}"
+    if forma < 0.25:
+        return f"São {nome}"
+    if forma < 0.35:
+        return f"{nome} de {''.join(rng.choice(SILABAS) for _ in range(2)).capitalize()}"
+    return nome
+
+# Função para gerar os dados de referência (concelhos, freguesias e NUT2)
+def gerar_referencia(n_concelhos=308, freguesias_por_concelho=10, seed=0):
+    rng = random.Random(seed)
+
+    concelhos = []
+    while len(concelhos) < n_concelhos:
+        nome = gerar_nome_local(rng)
+        if nome not in concelhos:
+            concelhos.append(nome)
+
+    registos = []
+    vistos = set(concelhos)
+    for i, concelho in enumerate(concelhos):
+        nut2 = NUTS2[i % len(NUTS2)]
+        for _ in range(freguesias_por_concelho):
+            freguesia = gerar_nome_local(rng)
+            if freguesia in vistos:
+                continue
+            vistos.add(freguesia)
+            registos.append({"Concelho": concelho, "Freguesia": freguesia, "NUT2": nut2})
+
+    return registos
+
+# Função para introduzir ruído num nome (maiúsculas, espaços, acentos e erros de escrita)
+def ruido(texto, rng, prob_erro=0.1):
+    if rng.random() < 0.3:
+        texto = "".join(c for c in unicodedata.normalize("NFD", texto) if unicodedata.category(c) != "Mn")
+    if rng.random() < 0.3:
+        texto = texto.upper() if rng.random() < 0.5 else texto.lower()
+    if rng.random() < 0.2:
+        texto = f" {texto}  ".replace(" ", "  ", 1)
+    if rng.random() < prob_erro and len(texto) > 4:
+        i = rng.randrange(1, len(texto) - 1)
+        texto = texto[:i] + texto[i + 1:] if rng.random() < 0.5 else texto[:i] + texto[i + 1] + texto[i] + texto[i + 2:]
+    return texto
+
+# Função para gerar o nome e o tipo de uma entidade tal como aparecem no inquérito
+def gerar_entidade(registo, rng, invalidos):
+    sorteio = rng.random()
+    if sorteio < 0.04:
+        return rng.choice(invalidos + [None]), rng.choice(list(TIPOS_ENTIDADE) + ["ND"])
+    if sorteio < 0.55:
+        prefixo = rng.choice(["Município de ", "Câmara Municipal de ", "CM ", "Municipio de ", ""])
+        return ruido(prefixo + registo["Concelho"], rng), "Município"
+    if sorteio < 0.92:
+        prefixo = rng.choice(["Junta de Freguesia de ", "União das Freguesias de ", "Freguesia de ", ""])
+        return ruido(prefixo + registo["Freguesia"], rng), "Freguesia"
+    return ruido("Serviços Municipalizados de " + registo["Concelho"], rng), "Serviços Municipalizados"
+
+# Função para gerar um inquérito sintético necessidades-formacao-{ano}.xlsx
+# Devolve o caminho e os limites (1-based) de cada grupo de colunas, no formato de ConfigColMap
+def gerar_inquerito(pasta, ano, linhas=2000, n_areas=20, cursos_por_area=10, registos=None, seed=0, formato="xlsx"):
+    rng = random.Random(seed)
+    np_rng = np.random.default_rng(seed)
+    registos = registos or gerar_referencia(seed=seed)
+    invalidos = [v for v in CONFIG_BENCH["invalid_values"] if v.strip()]
+
+    # Universo de entidades (com repetições para gerar duplicados)
+    universo = [gerar_entidade(rng.choice(registos), rng, invalidos) for _ in range(max(1, int(linhas * 0.8)))]
+    entidades = [rng.choice(universo) for _ in range(linhas)]
+
+    inicio = pd.Timestamp(f"{int(ano) - 1}-11-01") + pd.to_timedelta(np_rng.integers(0, 60 * 86400, linhas), unit="s")
+    duracao = pd.to_timedelta(np_rng.integers(-60, 7200, linhas), unit="s")
+    fim = inicio + duracao
+    submissao = pd.Series(fim).where(np_rng.random(linhas) > 0.1)
+    submissao[np_rng.random(linhas) < 0.05] = pd.Timestamp(f"{int(ano) - 3}-06-01")
+
+    colunas = {
+        "ID da resposta": np.arange(1, linhas + 1),
+        "Data de submissão": submissao,
+        "Última página": np_rng.integers(-1, 12, linhas),
+        "Data de início": inicio,
+        "Data da última acção": fim,
+        "Entidade do subsetor da Administração Local": [tipo for _, tipo in entidades],
+        "Designação da entidade (Município de / Freguesia de)": [nome for nome, _ in entidades],
+        "Responsável": np_rng.choice(["Sim", "Não", "sim", "nao", "ND", None], linhas),
+        "Nome do responsável": [f"Responsável {i}" if i % 7 else None for i in range(linhas)],
+        "Percentagem preenchida": np_rng.integers(0, 101, linhas)
+    }
+    grupos = {"identificacao": (1, len(colunas))}
+
+    # Formações: contagens esparsas com "X OU Y" e valores inválidos
+    valores_curso = np.array([None] * 6 + [0, 1, 2, 3, 5, 8, 12, "1 OU 2", "2 OU 3", "ND", "N/A", -1], dtype=object)
+    inicio_grupo = len(colunas) + 1
+    for a in range(n_areas):
+        for c in range(cursos_por_area):
+            nome = f"Formação/Curso [Área {a + 1}] [Curso {a + 1}.{c + 1}] - Número de formandos"
+            colunas[nome] = np_rng.choice(valores_curso, linhas)
+        colunas[f"Tempo do grupo: [Área {a + 1}]"] = np_rng.choice(valores_curso, linhas)
+    grupos["formacoes"] = (inicio_grupo, len(colunas))
+
+    # Interesses: SIM/NAO por área temática e um comentário livre
+    valores_sim_nao = np.array(["Sim", "Não", "SIM", "nao", "ND", None, None], dtype=object)
+    inicio_grupo = len(colunas) + 1
+    for a in range(n_areas):
+        colunas[f"Áreas temáticas [Área {a + 1}] - Interesse"] = np_rng.choice(valores_sim_nao, linhas)
+    colunas["Comentário [Áreas temáticas] - Sugestões"] = np_rng.choice(
+        np.array(["Sem sugestões", "Mais formação online", None, "ND"], dtype=object), linhas)
+    grupos["interesses"] = (inicio_grupo, len(colunas))
+
+    # Disponibilidade: formação contínua, regime e acolhimento de formandos
+    inicio_grupo = len(colunas) + 1
+    for regime in ["Laboral", "Pós-laboral", "Misto"]:
+        colunas[f"Formação contínua [Regime {regime}]"] = np_rng.choice(valores_sim_nao, linhas)
+    colunas["Recetivo a acolher formandos"] = np_rng.choice(valores_sim_nao, linhas)
+    grupos["disponibilidade"] = (inicio_grupo, len(colunas))
+
+    # Tipo de ensino: preferências de 1 a 6
+    inicio_grupo = len(colunas) + 1
+    for tipo in ["Presencial", "À distância", "B-learning"]:
+        colunas[f"Preferência [{tipo}]"] = np_rng.choice(np.array([1, 2, 3, 4, 5, 6, None, "ND"], dtype=object), linhas)
+    grupos["tipo de ensino"] = (inicio_grupo, len(colunas))
+
+    df = pd.DataFrame(colunas)
+    caminho = os.path.join(pasta, f"necessidades-formacao-{ano}.{formato}")
+    if formato == "csv":
+        df.to_csv(caminho, index=False)
+    else:
+        df.to_excel(caminho, index=False, engine="xlsxwriter")
+
+    return caminho, {nome: {"start": inicio, "end": fim} for nome, (inicio, fim) in grupos.items()}
+
+#========================================================================================================#
+
+#========================================= SUBSTITUTOS LOCAIS (BD) ======================================#
+
+# Substituto local de uma coleção MongoDB (apenas o que o ETL usa: find, find_one, update_one, create_index)
+class ColecaoLocal:
+    def __init__(self, documentos=None):
+        self.documentos = [dict(d) for d in documentos or []]
+
+    @staticmethod
+    def _corresponde(doc, filtro):
+        for campo, condicao in (filtro or {}).items():
+            valor = doc.get(campo)
+            if isinstance(condicao, dict):
+                if "$ne" in condicao and valor == condicao["$ne"]:
+                    return False
+                if "$in" in condicao and valor not in condicao["$in"]:
+                    return False
+            elif valor != condicao:
+                return False
+        return True
+
+    @staticmethod
+    def _projetar(doc, projecao):
+        if not projecao:
+            return dict(doc)
+        incluir = [campo for campo, v in projecao.items() if v and campo != "_id"]
+        if incluir:
+            return {campo: doc[campo] for campo in incluir if campo in doc}
+        return {campo: v for campo, v in doc.items() if projecao.get(campo, 1)}
+
+    def find(self, filtro=None, projecao=None):
+        return [self._projetar(d, projecao) for d in self.documentos if self._corresponde(d, filtro)]
+
+    def find_one(self, filtro=None, projecao=None):
+        return next(iter(self.find(filtro, projecao)), None)
+
+    def update_one(self, filtro, atualizacao, upsert=False):
+        for doc in self.documentos:
+            if self._corresponde(doc, filtro):
+                doc.update(atualizacao.get("$set", {}))
+                return
+        if upsert:
+            self.documentos.append({**filtro, **atualizacao.get("$set", {})})
+
+    def create_index(self, *args, **kwargs):
+        return None
+
+# Substituto local de uma base de dados MongoDB (coleções criadas a pedido)
+class MongoLocal(dict):
+    def __missing__(self, nome):
+        self[nome] = ColecaoLocal()
+        return self[nome]
+
+# Substituto local do cursor do SII (PostgreSQL) para as consultas usadas pelo ETL
+class CursorSIILocal:
+    def __init__(self, entidades):
+        self.entidades = entidades
+        self.description = None
+        self._linhas = []
+
+    def execute(self, sql):
+        if sql == ENTITIES_QUERY:
+            self.description = [("id_entidades",), ("ent_nome",), ("ent_tipo",)]
+            self._linhas = list(self.entidades)
+        elif sql == ENTITIES_SIGNATURE_QUERY:
+            self.description = [("count",), ("max",)]
+            self._linhas = [(len(self.entidades), max((e[0] for e in self.entidades), default=None))]
+        elif "DISTINCT ent_tipo" in sql:
+            self.description = [("ent_tipo",)]
+            self._linhas = [(tipo,) for tipo in dict.fromkeys(e[2] for e in self.entidades)]
+        else:
+            raise ValueError(f"Consulta não suportada pelo substituto do SII: {sql}")
+
+    def fetchall(self):
+        return list(self._linhas)
+
+    def fetchone(self):
+        return self._linhas[0] if self._linhas else None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+# Função para preparar as coleções MongoDB e as entidades do SII a partir dos dados de referência
+def preparar_substitutos(registos, ano, grupos):
+    mongo = MongoLocal()
+    mongo["CodigosPostais_PT"] = ColecaoLocal(registos)
+
+    ren_col = {
+        "Designação da entidade (Município de / Freguesia de)": "nome_entidade",
+        "Entidade do subsetor da Administração Local": "tipo_entidade",
+        "Data de início": "data_inicio",
+        "Data da última acção": "data_fim",
+        "Data de submissão": "data_submissao",
+        "Percentagem preenchida": "percentagem_preenchido",
+        "Nome do responsável": "nome_responsavel"
+    }
+    mongo["ConfigRenCol"] = ColecaoLocal(
+        {"original_name": original, "new_name": novo, "critical": False} for original, novo in ren_col.items()
+    )
+    mongo["ConfigMapEnt"] = ColecaoLocal(
+        {"tipo_entidade_inq": inq, "tipo_entidade_norm": norm} for inq, norm in TIPOS_ENTIDADE.items()
+    )
+    mongo["ConfigColMap"] = ColecaoLocal([{"year": int(ano), "groups": grupos}])
+
+    entidades = []
+    for concelho in dict.fromkeys(r["Concelho"] for r in registos):
+        entidades.append((len(entidades) + 1, f"Município de {concelho}", "Municípios"))
+        entidades.append((len(entidades) + 1, f"Serviços Municipalizados de {concelho}", "Serviços Municipalizados"))
+    for registo in registos:
+        entidades.append((len(entidades) + 1, f"Freguesia de {registo['Freguesia']}", "Freguesias"))
+
+    return mongo, CursorSIILocal(entidades)
+
+#========================================================================================================#
+
+#=============================================== MEDIÇÃO ================================================#
+
+@contextmanager
+def cronometro(tempos, etapa):
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        tempos[etapa] = tempos.get(etapa, 0.0) + time.perf_counter() - inicio
+
+# Etapas do ETL_20_3 (run_pipeline) com os dados de referência sintéticos em vez do MongoDB
+def bench_etl_20_3(caminho, registos, pasta_saida, config=CONFIG_BENCH):
+    from ETL_20_3 import run_pipeline
+
+    config = copy.deepcopy(config)
+    config["file_paths"] = {
+        "output": os.path.join(pasta_saida, "ETL_{ano}.xlsx"),
+        "removed": os.path.join(pasta_saida, "linhas_removidas_{ano}.xlsx"),
+        "cache": os.path.join(pasta_saida, ".cache_etl"),
+        "columns_count": os.path.join(pasta_saida, "inqueritos_cols.xlsx")
+    }
+
+    resultado = run_pipeline(config, caminho, referencia=registos)
+
+    tempos = {etapa["stage"]: etapa["seconds"] for etapa in resultado.metricas["stages"]}
+    tempos["total"] = resultado.metricas["total_seconds"]
+    linhas = {
+        "saida": len(resultado.df),
+        "removidas": len(resultado.df_removidos),
+        "etapas": {etapa["stage"]: [etapa["rows_in"], etapa["rows_out"]] for etapa in resultado.metricas["stages"]},
+        "pico_rss_mb": resultado.metricas["peak_rss_mb"]
+    }
+    return tempos, linhas
+
+# Etapas de test.run_etl (pipeline da interface) com MongoDB e SII substituídos localmente
+# (tempos, pico de memória e linhas por etapa vêm da instrumentação do próprio run_etl)
+def bench_run_etl(caminho, ano, mongo, cursor):
+    from test import run_etl
+
+    df = pd.read_excel(caminho) if not caminho.endswith(".csv") else pd.read_csv(caminho)
+    grupos, duplicados, sem_correspondencia, metricas = run_etl(int(ano), df, mongo, cursor)
+
+    tempos = {etapa["stage"]: etapa["seconds"] for etapa in metricas["stages"]}
+    tempos["total"] = metricas["total_seconds"]
+    linhas = {
+        "entrada": len(df),
+        "saida": len(grupos["identificacao"]),
+        "duplicados": len(duplicados),
+        "sem_correspondencia": len(sem_correspondencia),
+        "etapas": {etapa["stage"]: [etapa["rows_in"], etapa["rows_out"]] for etapa in metricas["stages"]},
+        "pico_rss_mb": metricas["peak_rss_mb"]
+    }
+    return tempos, linhas
+
+#========================================================================================================#
+
+#=============================================== RELATÓRIO ==============================================#
+
+def commit_atual():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+# Função para resumir as repetições de cada etapa (mínimo e mediana, em segundos)
+def resumir(execucoes):
+    etapas = dict.fromkeys(etapa for tempos in execucoes for etapa in tempos)
+    return {
+        etapa: {
+            "min": round(min(t[etapa] for t in execucoes if etapa in t), 6),
+            "mediana": round(statistics.median(t[etapa] for t in execucoes if etapa in t), 6)
+        }
+        for etapa in etapas
+    }
+
+# Função para limpar as caches em memória que sobrevivem entre execuções no mesmo processo
+# (os índices de locais são criados de novo em cada execução, a partir dos registos de referência)
+def limpar_caches():
+    import ETL_20_3
+
+    etl_normalize._normalize.cache_clear()
+    etl_transforms._compilar_classificador.cache_clear()
+    ETL_20_3.indice_cabecalhos.cache_clear()
+    ETL_20_3.padrao_interesse.cache_clear()
+    ETL_20_3.MEMORIA_CABECALHOS.clear()
+
+def executar(linhas=2000, n_areas=20, cursos_por_area=10, repeticoes=3, seed=0, formato="xlsx", ano=CONFIG_BENCH["ano"]):
+    relatorio = {
+        "meta": {
+            "commit": commit_atual(),
+            "data": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "plataforma": platform.platform(),
+            "parametros": {"linhas": linhas, "n_areas": n_areas, "cursos_por_area": cursos_por_area,
+                           "repeticoes": repeticoes, "seed": seed, "formato": formato, "ano": ano}
+        }
+    }
+
+    with tempfile.TemporaryDirectory() as pasta:
+        registos = gerar_referencia(seed=seed)
+        caminho, grupos = gerar_inquerito(pasta, ano, linhas, n_areas, cursos_por_area, registos, seed, formato)
+        mongo, cursor = preparar_substitutos(registos, ano, grupos)
+        relatorio["meta"]["colunas"] = grupos["tipo de ensino"]["end"]
+
+        for nome, bench in [
+            ("etl_20_3", lambda saida: bench_etl_20_3(caminho, registos, saida, copy.deepcopy(CONFIG_BENCH))),
+            ("run_etl", lambda saida: bench_run_etl(caminho, ano, mongo, cursor))
+        ]:
+            execucoes = []
+            for i in range(repeticoes):
+                # Cada repetição começa a frio: sem caches em memória nem ficheiros de cache (a pasta de saída é nova)
+                limpar_caches()
+                saida = os.path.join(pasta, f"{nome}-{i}")
+                os.makedirs(saida)
+                tempos, contagens = bench(saida)
+                execucoes.append(tempos)
+            relatorio[nome] = {"etapas": resumir(execucoes), "linhas": contagens}
+
+    return relatorio
+
+# Função para comparar dois relatórios (mediana por etapa e variação percentual)
+def comparar(base, atual):
+    linhas = []
+    for pipeline in ["etl_20_3", "run_etl"]:
+        etapas_base = base.get(pipeline, {}).get("etapas", {})
+        for etapa, valores in atual.get(pipeline, {}).get("etapas", {}).items():
+            antes = etapas_base.get(etapa, {}).get("mediana")
+            depois = valores["mediana"]
+            variacao = f"{(depois - antes) / antes * 100:+.1f}%" if antes else "—"
+            antes = f"{antes:.4f}" if antes is not None else "—"
+            linhas.append(f"{pipeline:<10} {etapa:<32} {antes:>10} {depois:>10.4f} {variacao:>9}")
+
+    cabecalho = f"{'pipeline':<10} {'etapa':<32} {base['meta'].get('commit') or 'base':>10} {atual['meta'].get('commit') or 'atual':>10} {'variação':>9}"
+    return "\n".join([cabecalho, "-" * len(cabecalho)] + linhas)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark do ETL com inquéritos FEFAL sintéticos.")
+    parser.add_argument("--linhas", type=int, default=2000)
+    parser.add_argument("--areas", type=int, default=20, help="número de áreas temáticas")
+    parser.add_argument("--cursos", type=int, default=10, help="cursos por área (colunas de formação = areas x cursos)")
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--formato", choices=["xlsx", "csv"], default="xlsx")
+    parser.add_argument("--saida", default="bench_output.json", help="ficheiro JSON do relatório")
+    parser.add_argument("--comparar", help="relatório JSON de outro commit para comparação")
+    args = parser.parse_args(argv)
+
+    relatorio = executar(args.linhas, args.areas, args.cursos, args.repeticoes, args.seed, args.formato)
+
+    with open(args.saida, "w", encoding="utf-8") as f:
+        json.dump(relatorio, f, indent=2, ensure_ascii=False)
+    print(f"Relatório guardado em {args.saida}")
+
+    if args.comparar:
+        with open(args.comparar, "r", encoding="utf-8") as f:
+            print(comparar(json.load(f), relatorio))
+    else:
+        for pipeline in ["etl_20_3", "run_etl"]:
+            for etapa, valores in relatorio[pipeline]["etapas"].items():
+                print(f"{pipeline:<10} {etapa:<32} {valores['mediana']:>10.4f}s")
+
+if __name__ == "__main__":
+    main()
+
+#========================================================================================================#
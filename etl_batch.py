@@ -0,0 +1,121 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import argparse
+import copy
+import glob
+import os
+
+from ETL_20_3 import (FILE_PATH_COL, atualizar_excel, carregar_config, carregar_referencia, extrair_ano,
+                      preparar_referencia, run_pipeline)
+
+# Referência (tabela de NUTS e índices de concelhos/freguesias) de cada processo de trabalho
+_REFERENCIA = None
+
+#================================================ FICHEIROS =============================================#
+
+# Função para obter {ano: inquérito} a partir de uma lista de anos e/ou de um padrão glob
+def ficheiros_por_ano(config, anos=None, padrao=None):
+    ficheiros = {}
+
+    for ano in anos or []:
+        ficheiros[str(ano)] = config["file_paths"]["input"].format(ano=ano)
+
+    if padrao:
+        for caminho in sorted(glob.glob(padrao)):
+            ano = extrair_ano(os.path.basename(caminho))
+            if ano == "ANO_DESCONHECIDO":
+                print(f"Aviso: Não foi possível obter o ano de '{caminho}'. O ficheiro será ignorado.")
+                continue
+            ficheiros[ano] = caminho
+
+    return dict(sorted(ficheiros.items()))
+
+#========================================================================================================#
+
+#================================================ EXECUÇÃO ==============================================#
+
+# Função de inicialização de cada processo: preparar a referência uma única vez por processo
+def _iniciar_processo(registos, prefixos):
+    global _REFERENCIA
+    _REFERENCIA = preparar_referencia(registos, prefixos)
+
+# Função executada em cada processo: ETL de um ano, devolvendo apenas o resumo (sem os DataFrames)
+def _executar_ano(config, ano, caminho):
+    config = copy.deepcopy(config)
+    config["ano"] = ano
+
+    resultado = run_pipeline(config, caminho, referencia=_REFERENCIA, atualizar_contagem=False)
+
+    return {
+        "ano": ano,
+        "input": caminho,
+        "caminho_saida": resultado.caminho_saida,
+        "caminho_removidos": resultado.caminho_removidos,
+        "linhas": len(resultado.df),
+        "removidas": len(resultado.df_removidos),
+        "media_tempo": resultado.media_tempo,
+        "contagem": resultado.contagem,
+        "metricas": resultado.metricas
+    }
+
+# Função para processar vários anos em paralelo e atualizar o ficheiro de contagem uma única vez no fim
+# registos: registos de CodigosPostais_PT (carregados do MongoDB uma única vez se None)
+def run_batch(config, anos=None, padrao=None, max_workers=None, registos=None, atualizar_contagem=True):
+    ficheiros = ficheiros_por_ano(config, anos, padrao)
+    if not ficheiros:
+        raise ValueError("Erro: Nenhum inquérito encontrado para os anos/padrão indicados.")
+
+    # Dados de referência só de leitura, carregados uma vez e enviados uma vez a cada processo
+    if registos is None:
+        registos = carregar_referencia()
+
+    resumos = {}
+    erros = {}
+    max_workers = max_workers or min(len(ficheiros), os.cpu_count() or 1)
+
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_iniciar_processo,
+                             initargs=(registos, config["prefixs"])) as executor:
+        futuros = {executor.submit(_executar_ano, config, ano, caminho): ano for ano, caminho in ficheiros.items()}
+
+        for futuro in as_completed(futuros):
+            ano = futuros[futuro]
+            try:
+                resumos[ano] = futuro.result()
+                print(f"Ano {ano} concluído: {resumos[ano]['linhas']} linhas ({resumos[ano]['removidas']} removidas).")
+            except Exception as e:
+                erros[ano] = e
+                print(f"Erro no ano {ano}: {e}")
+
+    # Escrever o ficheiro de contagem numa única passagem com todos os anos concluídos
+    if atualizar_contagem and resumos:
+        contagens = [resumos[ano]["contagem"] for ano in sorted(resumos)]
+        atualizar_excel(contagens, config["file_paths"].get("columns_count", FILE_PATH_COL))
+        print(f"Contagem de colunas atualizada para os anos: {', '.join(sorted(resumos))}")
+
+    return dict(sorted(resumos.items())), erros
+
+#========================================================================================================#
+
+#================================================== CLI =================================================#
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ETL de vários anos de inquéritos FEFAL em paralelo.")
+    parser.add_argument("anos", nargs="*", help="anos a processar (usa file_paths.input do config)")
+    parser.add_argument("--glob", dest="padrao", help="padrão dos inquéritos, ex.: 'data/necessidades-formacao-*.xlsx'")
+    parser.add_argument("--config", default="config.json", help="ficheiro de configuração")
+    parser.add_argument("--workers", type=int, help="número de processos (por omissão, um por ano até ao número de CPUs)")
+    parser.add_argument("--sem-contagem", action="store_true", help="não atualizar o ficheiro de contagem de colunas")
+    args = parser.parse_args(argv)
+
+    if not args.anos and not args.padrao:
+        parser.error("indique pelo menos um ano ou um padrão --glob")
+
+    config = carregar_config(args.config)
+    _, erros = run_batch(config, args.anos, args.padrao, args.workers, atualizar_contagem=not args.sem_contagem)
+
+    if erros:
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
+
+#========================================================================================================#
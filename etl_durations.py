@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+
+# Função para calcular a duração entre duas colunas de datas, em segundos (NaN se alguma das datas for nula)
+def duration_seconds(inicio, fim):
+    return (fim - inicio).dt.total_seconds()
+
+# Função para obter a duração em segundos inteiros (Int64), apenas quando é positiva
+def positive_duration(inicio, fim):
+    segundos = duration_seconds(inicio, fim) // 1
+    return segundos.where(segundos > 0).astype("Int64")
+
+# Textos "00".."99" (valores fora deste intervalo são raros e formatados um a um, tal como f"{n:02}")
+DOIS_DIGITOS = np.array([f"{n:02}" for n in range(100)], dtype=object)
+
+def _dois_digitos(valores):
+    resultado = DOIS_DIGITOS[np.clip(valores, 0, 99)]
+    fora = (valores < 0) | (valores > 99)
+    if fora.any():
+        resultado[fora] = [f"{n:02}" for n in valores[fora]]
+    return resultado
+
+# Função para formatar durações em segundos como "hh:mm:ss" (a partir de uma hora) ou "mm:ss" (nulos como "00:00")
+def format_duration(segundos):
+    segundos = pd.Series(segundos, dtype="float64")
+    valores = np.nan_to_num(segundos.to_numpy(), nan=0.0)
+
+    segs = _dois_digitos(np.mod(valores, 60).astype(np.int64))
+    longos = valores >= 3600
+
+    resultado = np.empty(len(valores), dtype=object)
+    resultado[~longos] = _dois_digitos(np.floor_divide(valores[~longos], 60).astype(np.int64)) + ":" + segs[~longos]
+    resultado[longos] = (
+        _dois_digitos(np.floor_divide(valores[longos], 3600).astype(np.int64)) + ":"
+        + _dois_digitos(np.floor_divide(np.mod(valores[longos], 3600), 60).astype(np.int64)) + ":"
+        + segs[longos]
+    )
+
+    return pd.Series(resultado, index=segundos.index, dtype=object)
+
+# Função para formatar uma única duração (ex.: a média dos tempos)
+def format_seconds(valor):
+    return format_duration([valor]).iat[0]
@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+import re
+
+from etl_normalize import normalize_text
+
+#=============================================== CONTAGENS ==============================================#
+
+INTEGER_TEXT = re.compile(r"^\s*[+-]?\d+\s*$")
+
+# Função para converter um bloco de contagens, equivalente a int(v) célula a célula com 0 para valores inválidos ou negativos
+# Cada valor distinto é convertido uma única vez com to_numeric (o texto só conta se for um inteiro, os floats são
+# truncados como em int()) e o bloco fica com o menor tipo sem sinal; devolve também, por coluna, o número de
+# células preenchidas que não eram números
+def coerce_counts(block: pd.DataFrame) -> tuple[pd.DataFrame, pd.Series]:
+    values = block.to_numpy(dtype=object)
+    codes, uniques = pd.factorize(values.ravel())
+    uniques = pd.Series(uniques, dtype=object)
+
+    numeric = pd.to_numeric(uniques, errors="coerce").astype(float)
+    numeric[uniques.map(lambda v: isinstance(v, str) and not INTEGER_TEXT.match(v)).astype(bool)] = np.nan
+    numeric = np.trunc(numeric.to_numpy())
+    invalid = ~np.isfinite(numeric)
+
+    if len(uniques):
+        cells = np.where(codes >= 0, numeric[codes], np.nan).reshape(values.shape)
+        coerced = ((codes >= 0) & invalid[codes]).reshape(values.shape)
+    else:
+        cells = np.full(values.shape, np.nan)
+        coerced = np.zeros(values.shape, dtype=bool)
+
+    cells = np.clip(np.nan_to_num(cells, nan=0, posinf=0, neginf=0), 0, None)
+    dtype = np.min_scalar_type(int(cells.max())) if cells.size else np.uint8
+    counts = pd.DataFrame(cells.astype(dtype), index=block.index, columns=block.columns)
+    return counts, pd.Series(coerced.sum(axis=0), index=block.columns)
+
+#========================================================================================================#
+
+#================================================ SIM/NÃO ===============================================#
+
+# Função para codificar um bloco de respostas sim/não, normalizando cada valor distinto uma única vez
+# ("sim" -> 1, "nao" -> 0, qualquer outro valor -> <NA>, em Int8)
+def encode_yes_no(block: pd.DataFrame) -> pd.DataFrame:
+    values = block.to_numpy(dtype=object)
+    codes, uniques = pd.factorize(values.ravel())
+    normalized = np.array([normalize_text(str(value), upper=False) for value in uniques], dtype=object)
+    encoded_uniques = np.select([normalized == "sim", normalized == "nao"], [1.0, 0.0], np.nan)
+    encoded = np.where(codes >= 0, encoded_uniques[codes] if len(uniques) else np.nan, np.nan)
+    return pd.DataFrame(encoded.reshape(values.shape), index=block.index, columns=block.columns).astype("Int8")
+
+# Função para substituir colunas por posição (mantém os novos tipos e funciona com nomes de colunas repetidos)
+def replace_columns(df: pd.DataFrame, positions: list[int], block: pd.DataFrame) -> pd.DataFrame:
+    df = df.copy()
+    for k, i in enumerate(positions):
+        df.isetitem(i, block.iloc[:, k])
+    return df
+
+#========================================================================================================#
+
+#================================================= TIPOS ================================================#
+
+CATEGORY_COLUMNS = ["tipo_entidade", "ano"]
+
+# Função para converter uma coluna para o menor tipo inteiro que guarda os valores
+# (sem sinal quando não há negativos, anulável apenas quando há valores em falta)
+def compact_integers(col: pd.Series) -> pd.Series:
+    valid = col.dropna()
+    if valid.empty:
+        return col
+    # Floats só com valores inteiros e dentro do intervalo de int64 (fora dele a conversão não guarda o valor)
+    if pd.api.types.is_float_dtype(col) and not ((valid % 1 == 0).all() and valid.min() >= -2**63 and valid.max() < 2**63):
+        return col
+    dtype = pd.to_numeric(valid.astype("int64"), downcast="unsigned" if valid.min() >= 0 else "integer").dtype
+    if dtype.itemsize >= col.dtype.itemsize and not pd.api.types.is_float_dtype(col):
+        return col
+    if col.isna().any():
+        return col.astype(dtype.name.replace("uint", "UInt").replace("int", "Int"))
+    return col.astype(dtype)
+
+# Função para compactar os tipos de um DataFrame: datas em datetime64, texto com poucos valores em category
+# e indicadores/contagens no menor tipo inteiro
+def optimize_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.copy()
+    for i, col in enumerate(df.columns):
+        values = df.iloc[:, i]
+        if col in CATEGORY_COLUMNS:
+            df.isetitem(i, values.astype("category"))
+        elif str(col).startswith("data_") and not pd.api.types.is_datetime64_any_dtype(values):
+            df.isetitem(i, pd.to_datetime(values, errors="coerce"))
+        elif pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values) and values.dtype.itemsize > 1:
+            df.isetitem(i, compact_integers(values))
+    return df
+
+#========================================================================================================#
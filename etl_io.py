@@ -0,0 +1,98 @@
+import hashlib
+import glob
+import os
+import pandas as pd
+import xlsxwriter
+
+#================================================ LEITURA ===============================================#
+
+PASTA_CACHE = ".cache_etl"
+
+# Função para obter o caminho da cópia em cache (chave: caminho, data de modificação e tamanho)
+def caminho_cache(caminho, pasta_cache=None):
+    info = os.stat(caminho)
+    chave = f"{os.path.abspath(caminho)}|{info.st_mtime_ns}|{info.st_size}"
+    chave = hashlib.sha1(chave.encode("utf-8")).hexdigest()[:16]
+
+    pasta_cache = pasta_cache or os.path.join(os.path.dirname(os.path.abspath(caminho)), PASTA_CACHE)
+    nome = os.path.splitext(os.path.basename(caminho))[0]
+
+    return os.path.join(pasta_cache, f"{nome}-{chave}")
+
+# Função para guardar a cópia colunar (Parquet; pickle se houver colunas com tipos mistos)
+def guardar_cache(df, base):
+    os.makedirs(os.path.dirname(base), exist_ok=True)
+
+    # Remover cópias antigas do mesmo ficheiro
+    nome = os.path.basename(base).rsplit("-", 1)[0]
+    for antigo in glob.glob(os.path.join(os.path.dirname(base), f"{glob.escape(nome)}-{'?' * 16}.*")):
+        os.remove(antigo)
+
+    try:
+        df.to_parquet(base + ".parquet", index=False)
+    except Exception:
+        if os.path.exists(base + ".parquet"):
+            os.remove(base + ".parquet")
+        df.to_pickle(base + ".pkl")
+
+# Função para ler o inquérito uma única vez, reutilizando a cópia em cache nas execuções seguintes
+def ler_inquerito(caminho, pasta_cache=None):
+    base = caminho_cache(caminho, pasta_cache)
+
+    if os.path.exists(base + ".parquet"):
+        return pd.read_parquet(base + ".parquet")
+    if os.path.exists(base + ".pkl"):
+        return pd.read_pickle(base + ".pkl")
+
+    if caminho.lower().endswith(".csv"):
+        df = pd.read_csv(caminho)
+    else:
+        df = pd.read_excel(caminho)
+
+    try:
+        guardar_cache(df, base)
+    except OSError as e:
+        print(f"Aviso: Não foi possível guardar a cache de '{caminho}': {e}")
+
+    return df
+
+#========================================================================================================#
+
+#================================================ ESCRITA ===============================================#
+
+# Função para escrever o DataFrame final numa única passagem (títulos, larguras e alinhamento incluídos)
+def escrever_excel(df, caminho, titulo, altura_cabecalho=70):
+    # Largura de cada coluna = maior texto (cabeçalho ou valor) + 2
+    larguras = []
+    for j, nome in enumerate(df.columns):
+        coluna = df.iloc[:, j]
+        tamanhos = coluna.astype(str).str.len().where(coluna.notna(), 0)
+        larguras.append(max(len(str(nome)), int(tamanhos.max()) if len(tamanhos) else 0) + 2)
+
+    with xlsxwriter.Workbook(caminho, {"constant_memory": True}) as wb:
+        ws = wb.add_worksheet(titulo)
+
+        # Formatos partilhados por todas as células
+        centro = wb.add_format({"align": "center", "valign": "vcenter"})
+        centro_data = wb.add_format({"align": "center", "valign": "vcenter", "num_format": "yyyy-mm-dd hh:mm:ss"})
+        cabecalho = wb.add_format({"bold": True, "border": 1, "align": "center", "valign": "vcenter"})
+
+        for j, largura in enumerate(larguras):
+            ws.set_column(j, j, largura)
+
+        ws.set_row(0, altura_cabecalho)
+        ws.write_row(0, 0, [str(nome) for nome in df.columns], cabecalho)
+
+        # Escrever as linhas por ordem (modo de memória constante)
+        for i, linha in enumerate(df.astype(object).itertuples(index=False, name=None), start=1):
+            for j, valor in enumerate(linha):
+                if isinstance(valor, (list, tuple, dict)):
+                    ws.write_string(i, j, str(valor), centro)
+                elif pd.isna(valor):
+                    ws.write_blank(i, j, None, centro)
+                elif isinstance(valor, pd.Timestamp):
+                    ws.write_datetime(i, j, valor.to_pydatetime(), centro_data)
+                else:
+                    ws.write(i, j, valor, centro)
+
+#========================================================================================================#
@@ -0,0 +1,46 @@
+from functools import lru_cache
+from unidecode import unidecode
+import numpy as np
+import pandas as pd
+import re
+
+ESPACOS = re.compile(r"\s+")
+
+# Versão da normalização (alterar sempre que _normalize mudar: invalida os resultados guardados em disco)
+VERSAO_NORMALIZACAO = 1
+
+# Cache partilhada por todas as colunas e execuções (o vocabulário dos inquéritos repete-se muito)
+@lru_cache(maxsize=131072)
+def _normalize(texto, upper):
+    texto = texto.strip()                # Remover espaços no início e no fim
+    texto = unidecode(texto)             # Remover acentos
+    texto = ESPACOS.sub(" ", texto)      # Substituir múltiplos espaços por um único espaço
+    return texto.upper() if upper else texto.lower()
+
+# Função para normalizar os dados (maiúsculas nos scripts ETL, minúsculas na UI)
+def normalize_text(texto, upper=True):
+    if not isinstance(texto, str) or not texto.strip():
+        return ""
+    return _normalize(texto, upper)
+
+# Função para normalizar texto e remover prefixos (ex.: "municipio de", "junta de freguesia de")
+def remove_prefixes(texto, prefixos, upper=True):
+    texto = normalize_text(texto, upper)
+    for prefixo in prefixos:
+        texto = re.sub(prefixo, "", texto)
+    return texto.strip()
+
+# Função para normalizar uma coluna inteira, normalizando apenas os valores distintos
+# (com prefixos, remove-os também de cada valor distinto)
+def normalize_series(serie, upper=True, prefixos=None):
+    codigos, valores = pd.factorize(serie)
+
+    if prefixos:
+        normalizados = [remove_prefixes(valor, prefixos, upper) for valor in valores]
+    else:
+        normalizados = [normalize_text(valor, upper) for valor in valores]
+
+    # O código -1 (nulos) aponta para o último elemento, que é ""
+    normalizados = np.array(normalizados + [""], dtype=object)
+
+    return pd.Series(normalizados[codigos], index=serie.index, name=serie.name, dtype=object)
@@ -0,0 +1,227 @@
+from collections import Counter, defaultdict
+from rapidfuzz import fuzz, process
+import pandas as pd
+import re
+
+#================================================= NUTS =================================================#
+
+TIPOS_NUTS = {"MUNICIPIO": "Concelho", "FREGUESIA": "Freguesia"}
+
+# Função para normalizar o valor de NUT2 (pode ser texto ou lista)
+def normalizar_nut2(nut2, normalizar):
+    if isinstance(nut2, list):
+        return [normalizar(palavra) for palavra in nut2]
+    elif isinstance(nut2, str):
+        return normalizar(nut2)
+    return "VAZIO"
+
+# Função para obter, para cada nome, o primeiro nome da lista com partial_ratio 100 (o que contém o nome ou está
+# contido nele), que é o que a pesquisa linear devolve para esse nome
+def primeiros_exatos(lista_nomes):
+    posicoes = {}
+    for i, nome in enumerate(lista_nomes):
+        posicoes.setdefault(nome, i)
+
+    primeiro = dict.fromkeys(posicoes, len(lista_nomes))
+    for j, nome in enumerate(lista_nomes):
+        # Nomes contidos neste (incluindo o próprio): este nome é candidato para eles e eles para este
+        contidos = {nome[a:b] for a in range(len(nome)) for b in range(a + 1, len(nome) + 1)} & posicoes.keys()
+        for contido in contidos:
+            primeiro[contido] = min(primeiro[contido], j)
+            primeiro[nome] = min(primeiro[nome], posicoes[contido])
+
+    return {nome: lista_nomes[i] for nome, i in primeiro.items()}
+
+# Função para construir a tabela de pesquisa {tipo: nomes normalizados -> NUT2} a partir dos registos
+def construir_tabela_nuts(registos, normalizar):
+    tabela = {}
+
+    for tipo, campo_busca in TIPOS_NUTS.items():
+        nomes = {}
+        por_nut2 = {}
+
+        for reg in registos:
+            if campo_busca not in reg or "NUT2" not in reg:
+                continue
+
+            nome = normalizar(reg[campo_busca])
+            nut2 = normalizar_nut2(reg["NUT2"], normalizar)
+            nomes[nome] = nut2
+
+            # Partição por NUT2 (listas de NUT2 não entram no filtro, tal como antes)
+            chave_nut2 = nut2 if isinstance(nut2, str) else ""
+            por_nut2.setdefault(chave_nut2, {})[nome] = nut2
+
+        tabela[tipo] = {
+            "nomes": nomes,
+            "lista_nomes": list(nomes),
+            "exatos": primeiros_exatos(list(nomes)),
+            "por_nut2": {nut2: (regs, list(regs), primeiros_exatos(list(regs))) for nut2, regs in por_nut2.items()}
+        }
+
+    return tabela
+
+# Função para obter a NUT2 de uma designação através da tabela de pesquisa
+def resolver_nut2(tabela, designacao, tipo, normalizar, score_minimo=80):
+    if tipo not in tabela or not isinstance(designacao, str):
+        return "VAZIO"
+
+    partes_nome = designacao.split(" - ")
+    nome_principal = normalizar(partes_nome[0])
+    nut2_filtro = normalizar(partes_nome[1]) if len(partes_nome) > 1 else None
+
+    # Se houver filtro de NUT2, reduzir o escopo da busca à partição correspondente
+    nomes, lista_nomes, exatos = tabela[tipo]["nomes"], tabela[tipo]["lista_nomes"], tabela[tipo]["exatos"]
+    if nut2_filtro and nut2_filtro in tabela[tipo]["por_nut2"]:
+        nomes, lista_nomes, exatos = tabela[tipo]["por_nut2"][nut2_filtro]
+
+    # Correspondência exata (o primeiro nome com score 100, tal como na pesquisa linear)
+    if nome_principal in exatos:
+        return nomes[exatos[nome_principal]]
+
+    # Correspondência difusa apenas sobre os nomes da partição
+    melhor = process.extractOne(nome_principal, lista_nomes, scorer=fuzz.partial_ratio, score_cutoff=score_minimo)
+    if not melhor:
+        return "VAZIO"
+
+    return nomes[melhor[0]]
+
+#========================================================================================================#
+
+#================================================ LOCAIS ================================================#
+
+# Índice de nomes de concelhos/freguesias para correspondência rápida
+class IndiceLocais:
+    def __init__(self, locais, normalizar, n=3, cobertura=0.5, max_candidatos=50):
+        self.normalizar = normalizar
+        self.n = n
+        self.cobertura = cobertura
+        self.max_candidatos = max_candidatos
+
+        # Normalizar os nomes uma única vez (sem repetidos)
+        self.locais = [local for local in dict.fromkeys(normalizar(local) for local in locais) if local]
+        self.exatos = set(self.locais)
+
+        # Índices de tokens e de n-gramas -> posições na lista de locais
+        self.indice_tokens = defaultdict(set)
+        self.indice_ngramas = defaultdict(set)
+        self.n_ngramas = []
+        for i, local in enumerate(self.locais):
+            for token in local.split():
+                self.indice_tokens[token].add(i)
+            ngramas = self.ngramas(local)
+            self.n_ngramas.append(len(ngramas))
+            for ngrama in ngramas:
+                self.indice_ngramas[ngrama].add(i)
+
+        self.cache = {}
+
+    def __len__(self):
+        return len(self.locais)
+
+    def ngramas(self, texto):
+        if len(texto) <= self.n:
+            return {texto}
+        return {texto[i:i + self.n] for i in range(len(texto) - self.n + 1)}
+
+    # Função para reduzir a lista de locais aos candidatos que partilham tokens ou n-gramas com o valor
+    def candidatos(self, valor):
+        ngramas = self.ngramas(valor)
+        contagem = Counter()
+        for ngrama in ngramas:
+            contagem.update(self.indice_ngramas.get(ngrama, ()))
+
+        candidatos = {
+            i for i, acertos in contagem.items()
+            if acertos >= self.cobertura * min(len(ngramas), self.n_ngramas[i])
+        }
+        for token in valor.split():
+            if len(token) > 3:
+                candidatos.update(self.indice_tokens.get(token, ()))
+
+        candidatos = sorted(candidatos, key=lambda i: contagem[i], reverse=True)
+        return [self.locais[i] for i in candidatos[:self.max_candidatos]]
+
+    # Função para encontrar o local correspondente ao valor (ou None)
+    def procurar(self, valor, score_minimo=80):
+        chave = (valor, score_minimo)
+        if chave not in self.cache:
+            self.cache[chave] = self._procurar(self.normalizar(valor), score_minimo)
+        return self.cache[chave]
+
+    # Função para procurar o local: correspondência exata ou por prefixo, depois o melhor candidato do índice
+    # e, só se o índice não tiver nenhum candidato acima do score mínimo, todos os locais
+    def _procurar(self, valor, score_minimo):
+        if not valor or not self.locais:
+            return None
+
+        # Correspondência exata
+        if valor in self.exatos:
+            return valor
+
+        # Correspondência por prefixo (ex.: "LISBOA - NORTE")
+        tokens = valor.split()
+        for i in range(len(tokens) - 1, 0, -1):
+            prefixo = " ".join(tokens[:i])
+            if prefixo in self.exatos:
+                return prefixo
+
+        # Correspondência difusa sobre a lista reduzida de candidatos
+        candidatos = self.candidatos(valor)
+        melhor = process.extractOne(valor, candidatos, scorer=fuzz.partial_ratio, score_cutoff=score_minimo) if candidatos else None
+
+        # Sem candidato, a pesquisa percorre todos os locais (os n-gramas não apanham, por exemplo,
+        # letras trocadas em nomes curtos que o partial_ratio aceita)
+        if not melhor:
+            melhor = process.extractOne(valor, self.locais, scorer=fuzz.partial_ratio, score_cutoff=score_minimo)
+        return melhor[0] if melhor else None
+
+#========================================================================================================#
+
+#=============================================== ENTIDADES ==============================================#
+
+# Função para validar a coluna de entidades, classificando cada par distinto (valor, tipo de entidade) uma única vez
+# Devolve a coluna com os valores normalizados e a máscara booleana das linhas válidas
+def validar_entidades(valores, tipos, indice_concelhos, indice_freguesias, tipos_municipio, tipos_freguesia,
+                      keywords, tipos_entidade_validos, limite_fuzzy, normalizar, limpar):
+    # Expressão única com todas as palavras-chave de município e freguesia
+    padrao_keywords = re.compile("|".join(re.escape(palavra) for palavra in keywords)) if keywords else None
+
+    def classificar(valor, entidade):
+        if pd.isna(valor) or not str(valor):
+            return None, True  # Sem valor, não há nada a validar
+
+        limpo = limpar(str(valor))
+
+        if len(normalizar(str(valor))) > 4:
+            # Tentar validar como concelho
+            if (not entidade or entidade in tipos_municipio) and indice_concelhos.procurar(limpo, limite_fuzzy):
+                return limpo, True
+
+            # Tentar validar como freguesia
+            if (not entidade or entidade in tipos_freguesia) and indice_freguesias.procurar(limpo, limite_fuzzy):
+                return limpo, True
+
+            # Verificação genérica para município e freguesia
+            if padrao_keywords and padrao_keywords.search(limpo):
+                return limpo, True
+
+        # Se o tipo de entidade for válido, mantém o valor normalizado
+        if entidade in tipos_entidade_validos:
+            return limpo, True
+
+        # Se nada foi identificado, mantém o valor original e marca a linha como inválida
+        return valor, False
+
+    if tipos is None:
+        tipos = pd.Series("", index=valores.index)
+
+    pares = list(zip(valores, tipos))
+    resultados = {par: classificar(*par) for par in set(pares)}
+
+    normalizados = pd.Series([resultados[par][0] for par in pares], index=valores.index, name=valores.name, dtype=object)
+    validos = pd.Series([resultados[par][1] for par in pares], index=valores.index, dtype=bool)
+
+    return normalizados, validos
+
+#========================================================================================================#
@@ -0,0 +1,80 @@
+import sys
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+
+#=============================================== MEMÓRIA ================================================#
+
+# Função para obter o pico de memória do processo, em bytes (None se a plataforma não o disponibilizar)
+def peak_rss():
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024  # ru_maxrss vem em KB no Linux e em bytes no macOS
+    except ImportError:
+        pass
+    try:
+        import psutil
+        return getattr(psutil.Process().memory_info(), "peak_wset", None)  # Windows (sem o módulo resource)
+    except ImportError:
+        return None
+
+# Função para converter bytes em MB (arredondado a duas casas)
+def to_mb(value):
+    return round(value / 2**20, 2) if value is not None else None
+
+#========================================================================================================#
+
+#================================================ ETAPAS ================================================#
+
+# Função para contar as linhas de um DataFrame, do grupo "identificacao" de um dicionário de grupos
+# ou do primeiro elemento de um tuplo (None se não houver linhas a contar)
+def count_rows(obj):
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        return len(obj)
+    if isinstance(obj, dict) and isinstance(obj.get("identificacao"), pd.DataFrame):
+        return len(obj["identificacao"])
+    if isinstance(obj, tuple) and obj:
+        return count_rows(obj[0])
+    return None
+
+# Registo do tempo, do aumento do pico de memória e das linhas de entrada/saída de cada etapa de uma execução
+class StageProfiler:
+    def __init__(self):
+        self.stages = []
+        self._started = time.perf_counter()
+        self._peak_start = peak_rss()
+
+    # Função para medir um bloco de código como uma etapa (o registo pode ser completado dentro do bloco)
+    @contextmanager
+    def stage(self, name, rows_in=None):
+        record = {"stage": name, "rows_in": rows_in, "rows_out": None}
+        peak_before = peak_rss()
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record["seconds"] = round(time.perf_counter() - start, 6)
+            peak_after = peak_rss()
+            record["peak_rss_delta_mb"] = to_mb(peak_after - peak_before) if peak_before is not None else None
+            self.stages.append(record)
+
+    # Função para executar uma função como etapa (linhas de entrada do primeiro argumento, de saída do resultado)
+    def run(self, name, func, *args, **kwargs):
+        with self.stage(name, count_rows(args[0]) if args else None) as record:
+            result = func(*args, **kwargs)
+            record["rows_out"] = count_rows(result)
+        return result
+
+    # Função para obter o relatório da execução (etapas, tempo total e pico de memória)
+    def report(self) -> dict:
+        peak = peak_rss()
+        return {
+            "stages": self.stages,
+            "total_seconds": round(time.perf_counter() - self._started, 6),
+            "peak_rss_mb": to_mb(peak),
+            "peak_rss_delta_mb": to_mb(peak - self._peak_start) if peak is not None else None
+        }
+
+#========================================================================================================#
@@ -0,0 +1,220 @@
+from functools import lru_cache
+from rapidfuzz import fuzz, process
+import hashlib
+import json
+import numpy as np
+import os
+import pandas as pd
+import re
+
+from etl_normalize import VERSAO_NORMALIZACAO
+
+#============================================== DUPLICADOS ==============================================#
+
+# Função para contar, por linha, as células nulas ou com valores inválidos
+def contar_invalidos(df, valores_invalidos):
+    return (df.isna() | df.isin(valores_invalidos)).sum(axis=1)
+
+# Função para obter os índices das linhas duplicadas de uma coluna
+# (em cada grupo mantém-se a primeira linha com menos células inválidas)
+def indices_duplicados(df, coluna, valores_invalidos, normalizar):
+    valores = df[coluna].dropna().astype(str)
+    if valores.empty:
+        return []
+
+    # Calcular a chave normalizada uma única vez por valor distinto
+    chaves = {valor: normalizar(valor).replace(" ", "") for valor in valores.unique()}
+
+    grupos = pd.DataFrame({
+        "chave": valores.map(chaves),
+        "invalidos": contar_invalidos(df.loc[valores.index], valores_invalidos),
+        "posicao": np.arange(len(valores))
+    }, index=valores.index)
+
+    # Ordenar para que a melhor linha de cada grupo fique em primeiro lugar
+    grupos = grupos.sort_values(["chave", "invalidos", "posicao"])
+    mask_duplicados = grupos.duplicated(subset="chave", keep="first")
+
+    return grupos[mask_duplicados].sort_values("posicao").index.tolist()
+
+#========================================================================================================#
+
+#=========================================== COLUNAS DE CURSOS ==========================================#
+
+# Famílias de palavras-chave das colunas de cursos, pela ordem de prioridade da classificação:
+# (família em config["keywords"], descrição em config["descriptions"], lista de categoria)
+FAMILIAS_CURSOS = [
+    ("comment", "comment", "cols_comentarios_fc"),
+    ("group_time", "group_time", None),
+    ("thematic_areas", "interest", "cols_interesses_fc"),
+    ("continuous_training", "continuous_training", "cols_continua_fc"),
+    ("preference", "preference", None),
+    ("regime", "regime", None)
+]
+CATEGORIAS_CURSOS = ["cols_comentarios_fc", "cols_interesses_fc", "cols_continua_fc", "cols_sumformados"]
+
+NOMES_ENTRE_PARENTESES = re.compile(r'\[(.*?)\]')
+SUFIXO_COMENTARIO = re.compile(r'(?i) - comentário')
+PREFIXO_TEMPO_GRUPO = re.compile(r'(?i)\btempo do grupo:\s*')
+
+# Função para compilar uma família de palavras-chave numa única expressão regular (alternância das palavras normalizadas)
+def compilar_familia(palavras, normalizar):
+    if not palavras:
+        return re.compile(r"(?!)")
+    return re.compile("|".join(re.escape(normalizar(palavra)) for palavra in palavras))
+
+@lru_cache(maxsize=32)
+def _compilar_classificador(familias, normalizar):
+    return {nome: compilar_familia(palavras, normalizar) for nome, palavras in familias}
+
+# Função para obter as expressões compiladas de todas as famílias (compiladas uma única vez por configuração)
+def compilar_classificador(keywords, normalizar):
+    nomes = ["training"] + [familia for familia, _, _ in FAMILIAS_CURSOS]
+    return _compilar_classificador(tuple((nome, tuple(keywords[nome])) for nome in nomes), normalizar)
+
+# Função para classificar as colunas de cursos numa única passagem pelos cabeçalhos
+# Devolve o mapeamento {coluna: novo nome} e as listas de colunas de cada categoria
+def classificar_colunas_cursos(colunas, keywords, descricoes, normalizar):
+    padroes = compilar_classificador(keywords, normalizar)
+    mapeamento_colunas = {}
+    categorias = {categoria: [] for categoria in CATEGORIAS_CURSOS}
+
+    for col in colunas:
+        if not col:
+            continue
+        col_normalizado = normalizar(col)
+
+        # Apenas colunas que contêm "Formação" ou "Curso" no nome
+        if not padroes["training"].search(col_normalizado):
+            continue
+
+        # Extrair o nome dentro de [ ]
+        nome_encontrado = NOMES_ENTRE_PARENTESES.findall(col_normalizado)
+        nome_final = " - ".join(nome_encontrado) if nome_encontrado else col_normalizado
+
+        # A primeira família encontrada (pela ordem de prioridade) define a categoria
+        for familia, descricao, categoria in FAMILIAS_CURSOS:
+            if padroes[familia].search(col_normalizado):
+                if familia == "comment":
+                    nome_final = SUFIXO_COMENTARIO.sub('', nome_final).strip()
+                elif familia == "group_time":
+                    nome_final = PREFIXO_TEMPO_GRUPO.sub('', nome_final).strip()
+                break
+        else:
+            descricao, categoria = "training_course", "cols_sumformados"
+
+        mapeamento_colunas[col] = f"{descricoes[descricao]}: {nome_final}"
+        if categoria:
+            categorias[categoria].append(col)
+
+    return mapeamento_colunas, categorias
+
+#========================================================================================================#
+
+#============================================== CABEÇALHOS ==============================================#
+
+PARENTESES_RETOS = re.compile(r"\[.*?\]")
+
+# Versão do formato da memória de cabeçalhos (a memória em disco de outra versão, ou da normalização, é descartada)
+VERSAO_MEMORIA_CABECALHOS = f"1-{VERSAO_NORMALIZACAO}"
+
+# Função para remover conteúdo dentro de [ ]
+def remover_parenteses(texto):
+    return PARENTESES_RETOS.sub("", texto).strip()
+
+# Índice dos cabeçalhos de um DataFrame (normalizados e sem [ ]), com memória dos resultados
+# por impressão digital do conjunto de cabeçalhos (inquéritos com a mesma estrutura resolvem-se de imediato)
+class IndiceCabecalhos:
+    def __init__(self, colunas, normalizar, memoria=None):
+        self.normalizar = normalizar
+        self.colunas = list(colunas)
+        self.limpas = [remover_parenteses(col) if isinstance(col, str) else col for col in self.colunas]
+        self.chaves = {
+            False: [normalizar(col) for col in self.colunas],
+            True: [normalizar(col) for col in self.limpas]
+        }
+
+        impressao = hashlib.sha1("\x1f".join(map(str, self.colunas)).encode("utf-8")).hexdigest()
+        self.memoria = (memoria if memoria is not None else {}).setdefault(impressao, {})
+
+    # Função para obter a coluna com maior partial_ratio (a primeira em caso de empate) ou None abaixo de score_minimo
+    # sem_parenteses: comparar (e devolver) os cabeçalhos sem o conteúdo dentro de [ ]
+    def procurar(self, alvo, score_minimo=80, sem_parenteses=False):
+        alvo_norm = self.normalizar(remover_parenteses(alvo) if sem_parenteses else alvo)
+        chave = f"{int(sem_parenteses)}|{score_minimo}|{alvo_norm}"
+
+        if chave not in self.memoria:
+            melhor = process.extractOne(alvo_norm, self.chaves[sem_parenteses], scorer=fuzz.partial_ratio,
+                                        score_cutoff=score_minimo)
+            self.memoria[chave] = None if melhor is None else melhor[2]
+
+        posicao = self.memoria[chave]
+        if posicao is None:
+            return None
+        return self.limpas[posicao] if sem_parenteses else self.colunas[posicao]
+
+# Função para juntar resultados a uma memória (mantendo os dicionários já usados pelos índices)
+def juntar_memoria_cabecalhos(memoria, novos):
+    for impressao, resultados in novos.items():
+        memoria.setdefault(impressao, {}).update(resultados)
+    return memoria
+
+# Função para carregar a memória de correspondências guardada em disco (juntando-a a `memoria`, se indicada)
+def carregar_memoria_cabecalhos(caminho, memoria=None):
+    memoria = {} if memoria is None else memoria
+    if not caminho or not os.path.exists(caminho):
+        return memoria
+    try:
+        with open(caminho, "r", encoding="utf-8") as f:
+            dados = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Aviso: Não foi possível ler a memória de cabeçalhos '{caminho}': {e}")
+        return memoria
+
+    if not isinstance(dados, dict) or dados.get("versao") != VERSAO_MEMORIA_CABECALHOS:
+        print(f"Aviso: A memória de cabeçalhos '{caminho}' é de outra versão e foi descartada.")
+        return memoria
+    return juntar_memoria_cabecalhos(memoria, dados.get("cabecalhos", {}))
+
+# Função para guardar a memória de correspondências (juntando-a à que já existir em disco)
+def guardar_memoria_cabecalhos(memoria, caminho):
+    if not caminho:
+        return
+    dados = juntar_memoria_cabecalhos(carregar_memoria_cabecalhos(caminho), memoria)
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+        temporario = f"{caminho}.{os.getpid()}.tmp"
+        with open(temporario, "w", encoding="utf-8") as f:
+            json.dump({"versao": VERSAO_MEMORIA_CABECALHOS, "cabecalhos": dados}, f, ensure_ascii=False)
+        os.replace(temporario, caminho)
+    except OSError as e:
+        print(f"Aviso: Não foi possível guardar a memória de cabeçalhos '{caminho}': {e}")
+
+#========================================================================================================#
+
+#========================================== PREENCHER CÉLULAS ===========================================#
+
+# Função para substituir as células nulas ou com valores inválidos de um bloco de colunas por `valor`
+def preencher_invalidos(bloco, valores_invalidos, valor):
+    return bloco.mask(bloco.isna() | bloco.isin(valores_invalidos), valor).infer_objects()
+
+# Função para tratar um bloco de colunas de números: "1 OU 2" passa a ser o valor mais elevado e as
+# células nulas ou com valores inválidos passam a 0 (todas as colunas tratadas numa única série)
+def maior_valor_ou_zero(bloco, valores_invalidos):
+    valores = pd.Series(bloco.to_numpy(dtype=object).ravel(), dtype=object)
+    resultado = valores.mask(valores.isna() | valores.isin(valores_invalidos), 0)
+
+    # Calcular o maior valor de cada texto "X OU Y" distinto (só há textos a tratar se o bloco tiver texto)
+    distintos = pd.Series(pd.unique(valores), dtype=object)
+    if pd.api.types.infer_dtype(distintos, skipna=True) in ("string", "mixed", "mixed-integer"):
+        com_ou = distintos[distintos.str.contains("OU", regex=False, na=False)]
+        if not com_ou.empty:
+            maximos = com_ou.str.split(" OU ", expand=True).astype(float).max(axis=1)
+            maximos = dict(zip(com_ou, maximos))
+            intervalos = valores.isin(list(maximos))
+            resultado[intervalos] = valores[intervalos].map(maximos)
+
+    resultado = pd.DataFrame(resultado.to_numpy().reshape(bloco.shape), index=bloco.index, columns=bloco.columns)
+    return resultado.infer_objects()
+
+#========================================================================================================#
@@ -1,7 +1,11 @@
 import pandas as pd
 import numpy as np
 import re
-from unidecode import unidecode
+from etl_db import load_entity_map
+from etl_durations import positive_duration
+from etl_frames import coerce_counts, encode_yes_no, optimize_dtypes, replace_columns
+from etl_normalize import normalize_text as normalize_base, normalize_series
+from etl_profile import StageProfiler
 import pandas as pd
 import numpy as np
 
@@ -11,12 +15,7 @@ prefixes = [
 ]
 
 def normalize_text(text):
-    if not isinstance(text, str):
-        return ""
-    text = text.strip()
-    text = unidecode(text)
-    text = re.sub(r"\s+", " ", text)
-    return text.lower()
+    return normalize_base(text, upper=False)
 def create_map(list, old_key, new_key):
     return {
         normalize_text(i[old_key]): i[new_key]
@@ -45,67 +44,76 @@ def query_to_df(cur, sql: str) -> pd.DataFrame:
     column_names = [desc[0] for desc in cur.description]
     return pd.DataFrame(data, columns=column_names)
 
-def run_etl(year: int, df: pd.DataFrame, mongo_db, cur_sii) -> tuple[dict[str, pd.DataFrame], pd.DataFrame, pd.DataFrame]:
-    configs = load_mongo_configs(mongo_db, year)
-    group_dfs = split_column_groups(df, configs["groups"])
-    group_dfs = normalize_column_names(group_dfs)
+def run_etl(year: int, df: pd.DataFrame, mongo_db, cur_sii, entity_cache=None) -> tuple[dict[str, pd.DataFrame], pd.DataFrame, pd.DataFrame, dict]:
+    profiler = StageProfiler()
+    configs = profiler.run("load_mongo_configs", load_mongo_configs, mongo_db, year)
+    group_dfs = profiler.run("split_column_groups", split_column_groups, df, configs["groups"])
+    group_dfs = profiler.run("normalize_column_names", normalize_column_names, group_dfs)
 
     # Process identification
-    df_id = group_dfs["identificacao"]
-    df_id.columns = [normalize_text(col) for col in df_id.columns]
-    df_id = rename_cols(df_id, configs["map_ren_col"], True)
-    df_id = df_id[~df_id["nome_entidade"].apply(normalize_text).isin(["", "nd", "nan", "n/a", "na", "não definido", "sem dados", None])]
-
-    if "tipo_entidade" in df_id:
-        df_id["tipo_entidade"] = df_id["tipo_entidade"].apply(lambda x: configs["map_ent"].get(normalize_text(x), x))
-    else:
-        df_id["tipo_entidade"] = "Municípios"
-
-    df_id["nome_entidade_norm"] = df_id["nome_entidade"].apply(lambda x: remove_prefixes(normalize_text(x), prefixes))
-
-    df_sii = query_to_df(cur_sii, "SELECT id_entidades, ent_nome, ent_tipo FROM entidades")
-    df_sii["ent_nome"] = df_sii["ent_nome"].apply(lambda x: remove_prefixes(x, prefixes))
-    df_sii["ent_tipo"] = df_sii["ent_tipo"].apply(normalize_text)
-
-    df_id["entity_key"] = df_id["nome_entidade_norm"] + "||" + df_id["tipo_entidade"].apply(normalize_text)
-    df_sii["entity_key"] = df_sii["ent_nome"] + "||" + df_sii["ent_tipo"]
-    map_entity = dict(zip(df_sii["entity_key"], df_sii["id_entidades"]))
-    df_id["id_entidade"] = df_id["entity_key"].map(map_entity)
-    group_dfs["identificacao"] = df_id
-
-    group_dfs = process_completion_percentage(group_dfs)
-    group_dfs = initialize_time_fields(group_dfs)
-    group_dfs = process_additional_fields(group_dfs, year)
-    group_dfs = process_formations(group_dfs)
-    group_dfs = process_interests(group_dfs)
-    group_dfs = process_availability(group_dfs)
-    group_dfs = validate_preferences(group_dfs)
-
-    full_data = pd.concat(group_dfs.values(), axis=1).reset_index(drop=True)
-    df_id_full = group_dfs["identificacao"].reset_index(drop=True)
-
-    valid_id_mask = df_id_full["id_entidade"].notna()
-    duplicate_mask_partial = df_id_full[valid_id_mask].duplicated(subset="id_entidade", keep="first")
-    duplicate_mask = pd.Series(False, index=df_id_full.index)
-    duplicate_mask[duplicate_mask_partial.index] = duplicate_mask_partial
-
-    unmatched_mask = df_id_full["id_entidade"].isna()
-
-    duplicate_df = full_data.iloc[duplicate_mask[duplicate_mask].index].reset_index(drop=True)
-    unmatched_df = full_data.iloc[unmatched_mask[unmatched_mask].index].reset_index(drop=True)
-
-    cols_to_remove = ["nome_entidade_norm", "entity_key", "data_inicio", "data_fim", "__pct", "__tempo"]
-    duplicate_df.drop(columns=[col for col in cols_to_remove if col in duplicate_df.columns], inplace=True, errors="ignore")
-    unmatched_df.drop(columns=[col for col in cols_to_remove if col in unmatched_df.columns], inplace=True, errors="ignore")
-
-    valid_idxs = df_id_full[~(duplicate_mask | unmatched_mask)].index
-    for group in group_dfs:
-        group_dfs[group] = group_dfs[group].reset_index(drop=True).loc[valid_idxs].reset_index(drop=True)
-
-    group_dfs["identificacao"].drop(columns=cols_to_remove, inplace=True, errors="ignore")
-
-    return group_dfs, duplicate_df, unmatched_df
-
+    with profiler.stage("identification", len(group_dfs["identificacao"])) as stage:
+        df_id = group_dfs["identificacao"]
+        df_id.columns = [normalize_text(col) for col in df_id.columns]
+        df_id = rename_cols(df_id, configs["map_ren_col"], True)
+        df_id = df_id[~normalize_series(df_id["nome_entidade"], upper=False).isin(["", "nd", "nan", "n/a", "na", "não definido", "sem dados", None])]
+
+        if "tipo_entidade" in df_id:
+            df_id["tipo_entidade"] = df_id["tipo_entidade"].apply(lambda x: configs["map_ent"].get(normalize_text(x), x))
+        else:
+            df_id["tipo_entidade"] = "Municípios"
+
+        df_id["nome_entidade_norm"] = normalize_series(df_id["nome_entidade"], upper=False, prefixos=prefixes)
+
+        map_entity = entity_cache.get(cur_sii) if entity_cache else load_entity_map(cur_sii, prefixes)
+
+        df_id["entity_key"] = df_id["nome_entidade_norm"] + "||" + normalize_series(df_id["tipo_entidade"], upper=False)
+        df_id["id_entidade"] = df_id["entity_key"].map(map_entity)
+        group_dfs["identificacao"] = df_id
+        stage["rows_out"] = len(df_id)
+
+    group_dfs = profiler.run("process_completion_percentage", process_completion_percentage, group_dfs)
+    group_dfs = profiler.run("initialize_time_fields", initialize_time_fields, group_dfs)
+    group_dfs = profiler.run("process_additional_fields", process_additional_fields, group_dfs, year)
+    formations_coerced = {}
+    group_dfs = profiler.run("process_formations", process_formations, group_dfs, formations_coerced)
+    group_dfs = profiler.run("process_interests", process_interests, group_dfs)
+    group_dfs = profiler.run("process_availability", process_availability, group_dfs)
+    group_dfs = profiler.run("validate_preferences", validate_preferences, group_dfs)
+
+    with profiler.stage("split_duplicates_unmatched", len(group_dfs["identificacao"])) as stage:
+        full_data = pd.concat(group_dfs.values(), axis=1).reset_index(drop=True)
+        df_id_full = group_dfs["identificacao"].reset_index(drop=True)
+
+        valid_id_mask = df_id_full["id_entidade"].notna()
+        duplicate_mask_partial = df_id_full[valid_id_mask].duplicated(subset="id_entidade", keep="first")
+        duplicate_mask = pd.Series(False, index=df_id_full.index)
+        duplicate_mask[duplicate_mask_partial.index] = duplicate_mask_partial
+
+        unmatched_mask = df_id_full["id_entidade"].isna()
+
+        duplicate_df = full_data.iloc[duplicate_mask[duplicate_mask].index].reset_index(drop=True)
+        unmatched_df = full_data.iloc[unmatched_mask[unmatched_mask].index].reset_index(drop=True)
+
+        cols_to_remove = ["nome_entidade_norm", "entity_key", "data_inicio", "data_fim", "__pct", "__tempo"]
+        duplicate_df.drop(columns=[col for col in cols_to_remove if col in duplicate_df.columns], inplace=True, errors="ignore")
+        unmatched_df.drop(columns=[col for col in cols_to_remove if col in unmatched_df.columns], inplace=True, errors="ignore")
+
+        valid_idxs = df_id_full[~(duplicate_mask | unmatched_mask)].index
+        for group in group_dfs:
+            group_dfs[group] = group_dfs[group].reset_index(drop=True).loc[valid_idxs].reset_index(drop=True)
+
+        group_dfs["identificacao"].drop(columns=cols_to_remove, inplace=True, errors="ignore")
+        stage["rows_out"] = len(group_dfs["identificacao"])
+
+    with profiler.stage("optimize_dtypes", len(group_dfs["identificacao"])) as stage:
+        group_dfs = {group: optimize_dtypes(df_group) for group, df_group in group_dfs.items()}
+        duplicate_df = optimize_dtypes(duplicate_df)
+        unmatched_df = optimize_dtypes(unmatched_df)
+        stage["rows_out"] = len(group_dfs["identificacao"])
+
+    metrics = profiler.report()
+    metrics["formations_coerced"] = formations_coerced
+    return group_dfs, duplicate_df, unmatched_df, metrics
 
 def load_mongo_configs(mongo_db, year: int) -> dict:
     ren_col = list(mongo_db["ConfigRenCol"].find({}, {"_id": 0}))
@@ -128,24 +136,20 @@ def normalize_column_names(group_dfs):
         df.columns = [normalize_text(col).strip() for col in df.columns]
     return group_dfs
 
-def process_identification(group_dfs, configs, cur_sii):
+def process_identification(group_dfs, configs, cur_sii, entity_cache=None):
     df_id = group_dfs["identificacao"]
     df_id.columns = [normalize_text(col) for col in df_id.columns]
     df_id = rename_cols(df_id, configs["map_ren_col"], True)
     if "nome_entidade" not in df_id:
         return {}, pd.DataFrame()
-    df_id = df_id[~df_id["nome_entidade"].apply(normalize_text).isin(["", "nd", "nan", "n/a", "na", "não definido", "sem dados", None])]
+    df_id = df_id[~normalize_series(df_id["nome_entidade"], upper=False).isin(["", "nd", "nan", "n/a", "na", "não definido", "sem dados", None])]
     if "tipo_entidade" in df_id:
         df_id["tipo_entidade"] = df_id["tipo_entidade"].apply(lambda x: configs["map_ent"].get(normalize_text(x), x))
     else:
         df_id["tipo_entidade"] = "Municípios"
-    df_id["nome_entidade_norm"] = df_id["nome_entidade"].apply(lambda x: remove_prefixes(normalize_text(x), prefixes))
-    df_sii = query_to_df(cur_sii, "SELECT id_entidades, ent_nome, ent_tipo FROM entidades")
-    df_sii["ent_nome"] = df_sii["ent_nome"].apply(lambda x: remove_prefixes(x, prefixes))
-    df_sii["ent_tipo"] = df_sii["ent_tipo"].apply(normalize_text)
-    df_id["entity_key"] = df_id["nome_entidade_norm"] + "||" + df_id["tipo_entidade"].apply(normalize_text)
-    df_sii["entity_key"] = df_sii["ent_nome"] + "||" + df_sii["ent_tipo"]
-    map_entity = dict(zip(df_sii["entity_key"], df_sii["id_entidades"]))
+    df_id["nome_entidade_norm"] = normalize_series(df_id["nome_entidade"], upper=False, prefixos=prefixes)
+    map_entity = entity_cache.get(cur_sii) if entity_cache else load_entity_map(cur_sii, prefixes)
+    df_id["entity_key"] = df_id["nome_entidade_norm"] + "||" + normalize_series(df_id["tipo_entidade"], upper=False)
     df_id["id_entidade"] = df_id["entity_key"].map(map_entity)
     valid_idxs = df_id[df_id["id_entidade"].notna()].index
     invalid_idxs = df_id[df_id["id_entidade"].isna()].index
@@ -176,10 +180,7 @@ def initialize_time_fields(group_dfs):
     if "data_inicio" in df.columns and "data_fim" in df.columns:
         df["data_inicio"] = pd.to_datetime(df["data_inicio"], errors="coerce")
         df["data_fim"] = pd.to_datetime(df["data_fim"], errors="coerce")
-        valid_mask = df["data_inicio"].notna() & df["data_fim"].notna()
-        df["tempo_realizacao"] = pd.NA
-        df.loc[valid_mask, "tempo_realizacao"] = (df.loc[valid_mask, "data_fim"] - df.loc[valid_mask, "data_inicio"]).dt.total_seconds()
-        df["tempo_realizacao"] = df["tempo_realizacao"].apply(lambda x: x if pd.notna(x) and x > 0 else pd.NA).astype("Int64")
+        df["tempo_realizacao"] = positive_duration(df["data_inicio"], df["data_fim"])
     elif "tempo_realizacao" not in df.columns:
         df["tempo_realizacao"] = pd.Series(dtype="Int64")
     group_dfs["identificacao"] = df
@@ -211,7 +212,7 @@ def process_additional_fields(group_dfs, year):
     # group_dfs["identificacao"] = df[["id_entidade", "ano", "data_submissao", "existe_responsavel", "nome_responsavel", "percentagem_preenchido", "tempo_realizacao"]]
     return group_dfs
 
-def process_formations(group_dfs):
+def process_formations(group_dfs, coerced_report=None):
     if "formacoes" not in group_dfs or group_dfs["formacoes"].empty:
         return group_dfs
     
@@ -222,37 +223,25 @@ def process_formations(group_dfs):
             if inval:
                 text = str(text).replace(str(inval), "")
         return text.strip()
-    def validate_numeric(v):
-        try:
-            num = int(v)
-            return num if num >= 0 else 0
-        except:
-            return 0
     group_dfs["formacoes"].columns = [clean_column_names(col, prefixes) for col in group_dfs["formacoes"].columns]
-    for col in group_dfs["formacoes"].columns:
-        group_dfs["formacoes"][col] = group_dfs["formacoes"][col].apply(validate_numeric)
+    group_dfs["formacoes"], coerced = coerce_counts(group_dfs["formacoes"])
+    if coerced_report is not None:
+        coerced_report.update({col: int(n) for col, n in coerced.items() if n})
     return group_dfs
 
 def process_interests(group_dfs):
     if "interesses" not in group_dfs or group_dfs["interesses"].empty:
         return group_dfs
-    for col in group_dfs["interesses"].columns:
-        col_normalized = normalize_text(col)
-        if "comentario" not in col_normalized:
-            group_dfs["interesses"][col] = group_dfs["interesses"][col].apply(
-                lambda v: 1 if (nv := normalize_text(str(v))) == "sim"
-                else 0 if nv == "nao" else None
-            )
+    df = group_dfs["interesses"]
+    positions = [i for i, col in enumerate(df.columns) if "comentario" not in normalize_text(col)]
+    if positions:
+        group_dfs["interesses"] = replace_columns(df, positions, encode_yes_no(df.iloc[:, positions]))
     return group_dfs
 
 def process_availability(group_dfs):
     if "disponibilidade" not in group_dfs or group_dfs["disponibilidade"].empty:
         return group_dfs
-    for col in group_dfs["disponibilidade"].columns:
-        group_dfs["disponibilidade"][col] = group_dfs["disponibilidade"][col].apply(
-            lambda v: 1 if (nv := normalize_text(str(v))) == "sim"
-            else 0 if nv == "nao" else None
-        )
+    group_dfs["disponibilidade"] = encode_yes_no(group_dfs["disponibilidade"])
     return group_dfs
 
 def validate_preferences(group_dfs):
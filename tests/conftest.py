@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Os módulos do ETL estão na raiz do repositório
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,51 @@
+import pickle
+
+from etl_db import ENTITIES_SIGNATURE_QUERY, EntityCache
+
+PREFIXOS = [r"^\s*(municipio|camara municipal)(\s+(de|do|da))?\s+"]
+
+# Cursor do SII com uma tabela de entidades fixa
+class CursorEntidades:
+    description = [("id_entidades",), ("ent_nome",), ("ent_tipo",)]
+
+    def __init__(self, linhas):
+        self.linhas = linhas
+        self.consultas = 0
+
+    def execute(self, consulta):
+        self.consulta = consulta
+        self.consultas += 1
+
+    def fetchone(self):
+        return (len(self.linhas), max(linha[0] for linha in self.linhas))
+
+    def fetchall(self):
+        return self.linhas
+
+LINHAS = [(1, "Município de Lisboa", "Municípios"), (2, "Freguesia de Sé", "Freguesias")]
+
+def test_cache_de_entidades_em_disco(tmp_path):
+    caminho = str(tmp_path / "entidades.pkl")
+    mapa = EntityCache(PREFIXOS, path=caminho).get(CursorEntidades(LINHAS))
+    assert mapa["lisboa||municipios"] == 1
+
+    # Mesmos prefixos: o mapa em disco é usado e só a assinatura é consultada
+    cursor = CursorEntidades(LINHAS)
+    assert EntityCache(PREFIXOS, path=caminho, ttl=0).get(cursor) == mapa
+    assert cursor.consultas == 1 and cursor.consulta == ENTITIES_SIGNATURE_QUERY
+    assert not list(tmp_path.glob("*.tmp"))
+
+def test_cache_de_entidades_com_outros_prefixos_descartada(tmp_path):
+    caminho = str(tmp_path / "entidades.pkl")
+    EntityCache(PREFIXOS, path=caminho).get(CursorEntidades(LINHAS))
+
+    # A assinatura da tabela não mudou, mas o mapa guardado foi construído com outros prefixos
+    mapa = EntityCache([], path=caminho).get(CursorEntidades(LINHAS))
+    assert "municipio de lisboa||municipios" in mapa and "lisboa||municipios" not in mapa
+
+def test_cache_de_entidades_sem_versao_descartada(tmp_path):
+    caminho = tmp_path / "entidades.pkl"
+    caminho.write_bytes(pickle.dumps({"map": {"antigo||municipios": 9}, "signature": (2, 2)}))
+
+    mapa = EntityCache(PREFIXOS, path=str(caminho)).get(CursorEntidades(LINHAS))
+    assert "antigo||municipios" not in mapa
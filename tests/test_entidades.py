@@ -0,0 +1,85 @@
+import copy
+import random
+from functools import partial
+
+import pandas as pd
+import pytest
+from rapidfuzz import fuzz
+
+from benchmark_etl import CONFIG_BENCH, gerar_entidade, gerar_nome_local, gerar_referencia, ruido
+from ETL_20_3 import clean_text, preparar_referencia, validar_entidades_inquerito
+from etl_normalize import normalize_text
+
+# Validação original, linha a linha (validar_local, validar_generico_municipio_freguesia e processar_entidade)
+# Devolve o valor final da entidade e se a linha é mantida
+def processar_entidade_linear(valor, tipo, concelhos, freguesias, config):
+    keywords = config["keywords"]
+    municipio_keywords, freguesia_keywords = keywords["municipio"], keywords["freguesia"]
+    limite_fuzzy = config["fuzzy_limit"]
+    limpar = partial(clean_text, prefixos=config["prefixs"])
+
+    def validar_local(valor, locais):
+        if not valor or len(normalize_text(valor)) <= 4:
+            return None
+        valor_norm = normalize_text(limpar(valor))
+        scores = [fuzz.partial_ratio(valor_norm, normalize_text(local)) for local in locais]
+        return limpar(valor) if scores and max(scores) >= limite_fuzzy else None
+
+    valor_verificado = str(valor) if pd.notna(valor) else None
+    if not valor_verificado:
+        return None, True
+
+    entidade = normalize_text(tipo) if pd.notna(tipo) else None
+
+    if not entidade or entidade in municipio_keywords[:keywords["n_entidades_municipios"]]:
+        if validar_local(valor_verificado, concelhos):
+            return limpar(valor_verificado), True
+
+    if not entidade or entidade in freguesia_keywords[:keywords["n_entidades_freguesias"]]:
+        if validar_local(valor_verificado, freguesias):
+            return limpar(valor_verificado), True
+
+    if len(normalize_text(valor_verificado)) > 4:
+        limpo = limpar(valor_verificado)
+        if any(palavra in limpo for palavra in municipio_keywords + freguesia_keywords):
+            return limpo, True
+
+    if entidade in keywords["entity_types"]:
+        return limpar(valor_verificado), True
+
+    return valor, False
+
+@pytest.fixture(scope="module")
+def inquerito():
+    rng = random.Random(1)
+    registos = gerar_referencia(seed=0)
+    invalidos = [v for v in CONFIG_BENCH["invalid_values"] if v.strip()]
+
+    entidades = [gerar_entidade(rng.choice(registos), rng, invalidos) for _ in range(1500)]
+    # Nomes fora da referência e com mais erros de escrita, para haver linhas removidas
+    entidades += [(ruido(gerar_nome_local(rng), rng, prob_erro=0.5), rng.choice(["Município", "Freguesia", "ND", None]))
+                  for _ in range(500)]
+
+    config = copy.deepcopy(CONFIG_BENCH)
+    entity_type = config["columns"]["entity_type"]
+    df = pd.DataFrame(entidades, columns=["DESIGNAÇÃO DA ENTIDADE", entity_type])
+    return registos, config, df
+
+def test_validacao_igual_a_linha_a_linha(inquerito):
+    registos, config, df = inquerito
+    coluna, entity_type = "DESIGNAÇÃO DA ENTIDADE", config["columns"]["entity_type"]
+    referencia = preparar_referencia(registos, config["prefixs"])
+
+    concelhos = list({clean_text(reg["Concelho"], config["prefixs"]) for reg in registos})
+    freguesias = list({clean_text(reg["Freguesia"], config["prefixs"]) for reg in registos})
+    esperado = [processar_entidade_linear(valor, tipo, concelhos, freguesias, config)
+                for valor, tipo in zip(df[coluna], df[entity_type])]
+    mantidas = [i for i, (_, valido) in zip(df.index, esperado) if valido]
+
+    removidos = []
+    resultado = validar_entidades_inquerito(df.copy(), config, coluna, referencia, removidos)
+
+    assert 0 < len(mantidas) < len(df)
+    assert list(resultado.index) == mantidas
+    assert list(resultado[coluna]) == [valor for valor, valido in esperado if valido]
+    assert sorted(pd.concat(removidos).index) == sorted(set(df.index) - set(mantidas))
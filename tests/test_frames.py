@@ -0,0 +1,104 @@
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from etl_frames import coerce_counts, compact_integers, encode_yes_no, optimize_dtypes
+
+# Conversão original, célula a célula (process_formations antes da conversão por bloco)
+def validate_numeric(v):
+    try:
+        num = int(v)
+        return num if num >= 0 else 0
+    except:
+        return 0
+
+# Células preenchidas que int() não converte (as que a conversão por bloco conta como corrigidas)
+def coerced_linear(v):
+    if v is None or (isinstance(v, float) and np.isnan(v)):
+        return False
+    try:
+        int(v)
+        return False
+    except (TypeError, ValueError, OverflowError):
+        return True
+
+VALORES = [0, 1, 7, 250, 70000, -3, 2.0, 2.7, -0.5, 1e3, np.nan, None, float("inf"),
+           "3", " 12 ", "+4", "-8", "", " ", "2.5", "1e3", "abc", "N/A", "sim", "0012"]
+
+@pytest.fixture
+def bloco():
+    rng = random.Random(0)
+    linhas = [[rng.choice(VALORES) for _ in range(6)] for _ in range(300)]
+    return pd.DataFrame(linhas, columns=[f"curso {i}" for i in range(6)], dtype=object)
+
+def test_coerce_counts_igual_ao_ciclo_por_celula(bloco):
+    counts, coerced = coerce_counts(bloco)
+
+    esperado = bloco.apply(lambda col: col.map(validate_numeric))
+    assert counts.to_numpy().tolist() == esperado.to_numpy().tolist()
+    assert all(dtype.kind == "u" for dtype in counts.dtypes)
+    assert coerced.tolist() == bloco.apply(lambda col: col.map(coerced_linear).sum()).tolist()
+
+def test_coerced_report(bloco):
+    from test import process_formations
+
+    relatorio = {}
+    process_formations({"formacoes": bloco.copy()}, relatorio)
+
+    esperado = {col: int(n) for col, n in bloco.apply(lambda col: col.map(coerced_linear).sum()).items() if n}
+    assert relatorio == esperado
+
+def test_coerce_counts_bloco_vazio():
+    counts, coerced = coerce_counts(pd.DataFrame({"curso": pd.Series([], dtype=object)}))
+    assert counts.empty and coerced.tolist() == [0]
+
+def test_encode_yes_no():
+    bloco = pd.DataFrame({"a": ["Sim", " NÃO ", None, "talvez"], "b": ["nao", "SIM", np.nan, ""]})
+    codificado = encode_yes_no(bloco)
+    assert str(codificado.dtypes.iloc[0]) == "Int8"
+    assert codificado["a"].tolist() == [1, 0, pd.NA, pd.NA]
+    assert codificado["b"].tolist() == [0, 1, pd.NA, pd.NA]
+
+# Valores de cada coluna como objetos Python (nulos como None), para comparar antes e depois da compactação
+def valores(col):
+    return [None if pd.isna(v) else v for v in col.astype(object)]
+
+COLUNAS = {
+    "percentagem": pd.Series([0, 50, 100, 100], dtype="int64"),
+    "negativos": pd.Series([-200, 5, 0, 127], dtype="int64"),
+    "grandes": pd.Series([70000, 1, 2**40, 3], dtype="int64"),
+    "uint64": pd.Series([2**63 + 5, 1, 0, 2], dtype="uint64"),
+    "int64_na": pd.Series([1, None, 300, 2], dtype="Int64"),
+    "int64_na_neg": pd.Series([-129, None, 5, None], dtype="Int64"),
+    "int64_na_grandes": pd.Series([2**40, None, 1, 0], dtype="Int64"),
+    "so_na": pd.Series([None] * 4, dtype="Int64"),
+    "float_inteiros": pd.Series([1.0, np.nan, 65536.0, 0.0]),
+    "float_decimais": pd.Series([1.5, np.nan, 2.0, 0.0]),
+    "float_fora_int64": pd.Series([1e20, 2.0, -1e19, np.nan]),
+    "flags": pd.Series([1, 0, None, 1], dtype="Int8"),
+}
+
+@pytest.mark.parametrize("nome", list(COLUNAS))
+def test_compact_integers_mantem_os_valores(nome):
+    col = COLUNAS[nome]
+    compacta = compact_integers(col)
+    assert valores(compacta) == valores(col)
+    assert compacta.dtype.itemsize <= col.dtype.itemsize
+
+def test_optimize_dtypes_mantem_os_valores():
+    df = pd.DataFrame(COLUNAS)
+    df["tipo_entidade"] = ["Município", "Freguesia", "Município", None]
+    df["ano"] = [2024, 2024, 2025, 2024]
+    df["data_submissao"] = ["2024-01-02 10:00", None, "2024-03-04 09:30", "x"]
+    df["nome"] = ["a", "b", "c", "d"]
+
+    compacto = optimize_dtypes(df)
+
+    assert str(compacto["tipo_entidade"].dtype) == "category" and str(compacto["ano"].dtype) == "category"
+    assert pd.api.types.is_datetime64_any_dtype(compacto["data_submissao"])
+    assert compacto["data_submissao"].isna().tolist() == [False, True, False, True]
+    for col in df.columns.drop("data_submissao"):
+        assert valores(compacto[col]) == valores(df[col]), col
+    assert str(compacto["int64_na"].dtype) == "UInt16" and str(compacto["int64_na_neg"].dtype) == "Int16"
@@ -0,0 +1,103 @@
+import random
+import time
+
+import pytest
+from rapidfuzz import fuzz, process
+
+from benchmark_etl import gerar_nome_local, gerar_referencia
+from etl_normalize import normalize_text
+from etl_places import IndiceLocais, construir_tabela_nuts, resolver_nut2
+
+# Pesquisa linear original (find_best_match): o primeiro local com o maior partial_ratio, se >= score_minimo
+def procurar_linear(valor, locais, score_minimo):
+    valor = normalize_text(valor)
+    if not valor:
+        return None
+    scores = [(local, fuzz.partial_ratio(valor, normalize_text(local))) for local in locais]
+    scores.sort(key=lambda x: x[1], reverse=True)
+    return normalize_text(scores[0][0]) if scores and scores[0][1] >= score_minimo else None
+
+# Erros de escrita: letras trocadas, omitidas e repetidas
+def com_erro(nome, rng):
+    i = rng.randrange(1, len(nome) - 1)
+    tipo = rng.choice(["troca", "omissao", "repeticao"])
+    if tipo == "troca":
+        return nome[:i] + nome[i + 1] + nome[i] + nome[i + 2:]
+    if tipo == "omissao":
+        return nome[:i] + nome[i + 1:]
+    return nome[:i] + nome[i] + nome[i:]
+
+@pytest.fixture(scope="module")
+def freguesias():
+    return list(dict.fromkeys(registo["Freguesia"] for registo in gerar_referencia(seed=0)))
+
+@pytest.mark.parametrize("valor, locais, esperado", [
+    ("SAO UGAAL", ["SAO GUAAL", "LISBOA"], "SAO GUAAL"),
+    ("ESGURAA", ["ESGUARA", "LISBOA"], "ESGUARA"),
+])
+def test_letras_trocadas(valor, locais, esperado):
+    indice = IndiceLocais(locais, normalize_text)
+    assert indice.procurar(valor, 80) == esperado == procurar_linear(valor, locais, 80)
+
+# Valores com erros de escrita e nomes fora da referência
+def valores_teste(freguesias, rng):
+    valores = [com_erro(nome, rng) for nome in rng.sample(freguesias, 300) if len(nome) > 4]
+    return valores + [gerar_nome_local(rng) for _ in range(100)]
+
+# O índice pode devolver outro local com score suficiente (empates a 100 ou o melhor da lista reduzida),
+# mas encontra correspondência exatamente para os mesmos valores que a pesquisa linear
+@pytest.mark.parametrize("score_minimo", [80, 90])
+def test_indice_encontra_os_mesmos_valores(freguesias, score_minimo):
+    indice = IndiceLocais(freguesias, normalize_text)
+
+    for valor in valores_teste(freguesias, random.Random(0)):
+        local = indice.procurar(valor, score_minimo)
+        assert (local is None) == (procurar_linear(valor, freguesias, score_minimo) is None), valor
+        assert local is None or fuzz.partial_ratio(normalize_text(valor), local) >= score_minimo
+
+def test_indice_mais_rapido_que_pesquisa_linear(freguesias):
+    valores = [normalize_text(valor) for valor in valores_teste(freguesias, random.Random(1))]
+    locais = IndiceLocais(freguesias, normalize_text).locais
+
+    def medir(procurar):
+        inicio = time.perf_counter()
+        for valor in valores:
+            procurar(valor)
+        return time.perf_counter() - inicio
+
+    # Índice novo em cada medição (sem a memória dos resultados) contra um extractOne sobre todos os locais
+    tempo_indice = min(medir(IndiceLocais(freguesias, normalize_text).procurar) for _ in range(3))
+    tempo_linear = min(medir(lambda valor: process.extractOne(valor, locais, scorer=fuzz.partial_ratio, score_cutoff=80))
+                       for _ in range(3))
+    assert tempo_indice < tempo_linear
+
+# Pesquisa original da NUT2 (buscar_nutii): pesquisa linear sobre os nomes, filtrados pela NUT2 quando indicada
+def buscar_nutii_linear(registos, designacao, tipo):
+    campo_busca = "Concelho" if tipo == "MUNICIPIO" else "Freguesia"
+    nome_para_nut2 = {reg[campo_busca]: reg["NUT2"] for reg in registos}
+
+    partes_nome = designacao.split(" - ")
+    nut2_filtro = partes_nome[1].strip() if len(partes_nome) > 1 else None
+    filtrados = nome_para_nut2
+    if nut2_filtro:
+        filtrados = {nome: nut for nome, nut in nome_para_nut2.items() if normalize_text(nut) == normalize_text(nut2_filtro)}
+        filtrados = filtrados or nome_para_nut2
+
+    valor = normalize_text(partes_nome[0].strip())
+    scores = sorted(((nome, fuzz.partial_ratio(valor, normalize_text(nome))) for nome in filtrados), key=lambda x: x[1], reverse=True)
+    return normalize_text(filtrados[scores[0][0]]) if scores[0][1] >= 80 else "VAZIO"
+
+@pytest.mark.parametrize("tipo, campo", [("MUNICIPIO", "Concelho"), ("FREGUESIA", "Freguesia")])
+def test_resolver_nut2_igual_a_pesquisa_linear(tipo, campo):
+    rng = random.Random(2)
+    registos = gerar_referencia(seed=0)
+    tabela = construir_tabela_nuts(registos, normalize_text)
+
+    amostra = rng.sample(registos, 150)
+    designacoes = [reg[campo] for reg in amostra]                                         # Nomes exatos
+    designacoes += [f"{reg[campo].upper()} - {rng.choice([reg['NUT2'], 'Norte', 'Inexistente'])}" for reg in amostra]
+    designacoes += [com_erro(reg[campo], rng) for reg in amostra if len(reg[campo]) > 4]   # Erros de escrita
+    designacoes += [gerar_nome_local(rng) for _ in range(50)]                              # Fora da referência
+
+    for designacao in designacoes:
+        assert resolver_nut2(tabela, designacao, tipo, normalize_text) == buscar_nutii_linear(registos, designacao, tipo), designacao
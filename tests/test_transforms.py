@@ -0,0 +1,87 @@
+import json
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from etl_normalize import normalize_text
+from etl_transforms import (VERSAO_MEMORIA_CABECALHOS, IndiceCabecalhos, carregar_memoria_cabecalhos,
+                            guardar_memoria_cabecalhos, indices_duplicados)
+
+def test_memoria_cabecalhos_guardada_com_versao(tmp_path):
+    caminho = tmp_path / "cabecalhos.json"
+    memoria = {}
+    IndiceCabecalhos(["NUT II", "RESPONSÁVEL"], normalize_text, memoria).procurar("RESPONSAVEL")
+
+    guardar_memoria_cabecalhos(memoria, str(caminho))
+
+    assert json.loads(caminho.read_text(encoding="utf-8"))["versao"] == VERSAO_MEMORIA_CABECALHOS
+    assert carregar_memoria_cabecalhos(str(caminho)) == memoria
+
+def test_memoria_cabecalhos_de_outra_versao_descartada(tmp_path):
+    caminho = tmp_path / "cabecalhos.json"
+    antiga = {"impressao": {"0|80|RESPONSAVEL": 1}}
+
+    # Formato sem versão (anterior) e formato de outra versão
+    for dados in [antiga, {"versao": "0", "cabecalhos": antiga}]:
+        caminho.write_text(json.dumps(dados), encoding="utf-8")
+        assert carregar_memoria_cabecalhos(str(caminho)) == {}
+
+    # Ao guardar, a memória antiga é substituída e não misturada com a nova
+    guardar_memoria_cabecalhos({"nova": {"0|80|NUT II": 0}}, str(caminho))
+    assert carregar_memoria_cabecalhos(str(caminho)) == {"nova": {"0|80|NUT II": 0}}
+
+INVALIDOS = ["ND", "NULL", "NA", "N/A", "NUNCA", "", " "]
+
+# Remoção de duplicados original: comparação de todos os pares de linhas
+def duplicados_pares(df, coluna, valores_invalidos):
+    idxs_duplicated = set()
+
+    def contar_invalidos(idx):
+        return df.loc[idx].apply(lambda x: pd.isnull(x) or x in valores_invalidos).sum()
+
+    for idx_v, valor in df[coluna].items():
+        if pd.isna(valor):
+            continue
+        valor_norm = normalize_text(str(valor)).replace(" ", "")
+
+        for idx_vc, valor_comparado in df[coluna].items():
+            if idx_v == idx_vc or idx_v in idxs_duplicated or idx_vc in idxs_duplicated or pd.isna(valor_comparado):
+                continue
+            if valor_norm == normalize_text(str(valor_comparado)).replace(" ", ""):
+                if contar_invalidos(idx_v) <= contar_invalidos(idx_vc):
+                    idxs_duplicated.add(idx_vc)
+                else:
+                    idxs_duplicated.add(idx_v)
+
+    return idxs_duplicated
+
+# Entidades repetidas com variações de escrita, chaves nulas e linhas com mais ou menos células inválidas
+def gerar_respostas(seed, linhas=120):
+    rng = random.Random(seed)
+    nomes = ["Município de Óbidos", "MUNICIPIO DE OBIDOS", "municipio de  obidos", "Freguesia da Sé", "FREGUESIA DA SE",
+             "Junta de Freguesia de Arruda", "Arruda", "ND", None, np.nan, 1, 1.0]
+    respostas = ["SIM", "NAO", "ND", "", None, np.nan, "NULL", "2"]
+    dados = {"DESIGNAÇÃO DA ENTIDADE": [rng.choice(nomes) for _ in range(linhas)]}
+    for i in range(4):
+        dados[f"P{i}"] = [rng.choice(respostas) for _ in range(linhas)]
+    df = pd.DataFrame(dados)
+
+    # Linhas só com valores inválidos (empates de contagem dentro dos grupos)
+    for i in rng.sample(range(linhas), 15):
+        df.iloc[i, 1:] = rng.choice(["ND", None, ""])
+    df.index = rng.sample(range(1000), linhas)  # Índice fora de ordem, como depois de filtragens anteriores
+    return df
+
+@pytest.mark.parametrize("seed", range(5))
+def test_indices_duplicados_igual_a_comparacao_por_pares(seed):
+    df = gerar_respostas(seed)
+    indices = indices_duplicados(df, "DESIGNAÇÃO DA ENTIDADE", INVALIDOS, normalize_text)
+
+    assert set(indices) == duplicados_pares(df, "DESIGNAÇÃO DA ENTIDADE", INVALIDOS)
+    assert len(indices) == len(set(indices))
+
+def test_indices_duplicados_sem_valores():
+    df = pd.DataFrame({"DESIGNAÇÃO DA ENTIDADE": [None, np.nan], "P0": ["SIM", "ND"]})
+    assert indices_duplicados(df, "DESIGNAÇÃO DA ENTIDADE", INVALIDOS, normalize_text) == []